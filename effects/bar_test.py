@@ -1,5 +1,6 @@
 from modules.effect import LightEffect, ParamType, EffectType
-import colorsys
+import modules.mathutils as mu
+import numpy as np
 
 class BarTest(LightEffect):
     def __init__(self, renderer, coords):
@@ -9,14 +10,9 @@ class BarTest(LightEffect):
         self.maxx = max(coord[0] for coord in coords)
 
     def update(self):
-        self.thresholds = []
-        step = 1 / int(self.bar_count.get())
-        for i in range(int(self.bar_count.get())):
-            self.thresholds.append(step * i)
-        for led in range(len(self.renderer)):
-            hue_full = (self.coords[led][0] - self.minx) / (self.maxx - self.minx)
-            # floor the hue to the nearest threshold
-            hue = min(self.thresholds, key=lambda x: abs(x - hue_full))
-            r, g, b = colorsys.hsv_to_rgb(hue, 1.0, 1.0)
-            self.renderer[led] = [int(r * 255), int(g * 255), int(b * 255)]
-        self.renderer.show()
\ No newline at end of file
+        bar_count = int(self.bar_count.get())
+        hue_full = (self.positions[:, 0] - self.minx) / (self.maxx - self.minx)
+        # round the hue to the nearest of the bar_count thresholds (0, 1/bar_count, ...)
+        hue = np.minimum(np.round(hue_full * bar_count), bar_count - 1) / bar_count
+        self.frame[:] = mu.hsv_to_rgb_array(hue, 1.0, 1.0) * 255
+        self.show_frame()
\ No newline at end of file
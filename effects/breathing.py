@@ -1,6 +1,4 @@
 from modules.effect import LightEffect, ParamType, EffectType
-import modules.mathutils as mu
-import time
 
 class Breathing(LightEffect):
     def __init__(self, renderer, coords):
@@ -8,16 +6,19 @@ class Breathing(LightEffect):
         self.fade_speed = self.add_parameter("Fade Speed", ParamType.SLIDER, 50, min=1, max=500, step=1)
         self.color = self.add_parameter("Color", ParamType.COLOR, "#FF0000")
         self.off_time = 0.5
+        self.off_timer = 0 # Remaining time of the off period
         self.t = 0
         self.dir = 1
 
     def update(self):
-        self.t += self.dir * self.fade_speed.get() / 10000
+        if self.off_timer > 0:
+            self.off_timer -= self.delta_time
+            return
+        self.t += self.dir * self.fade_speed.get() / 10000 * self.delta_time * 60
         if self.t >= 1:
             self.dir = -1
         elif self.t <= 0:
             self.dir = 1
-            time.sleep(self.off_time)
-        for i in range(len(self.renderer)):
-            self.renderer[i] = [mu.clamp(int(channel * self.t), 0, 255) for channel in self.color.get()]
-        self.renderer.show()
\ No newline at end of file
+            self.off_timer = self.off_time
+        self.frame[:] = [channel * self.t for channel in self.color.get()]
+        self.show_frame()
\ No newline at end of file
@@ -1,9 +1,9 @@
 from modules.effect import LightEffect, ParamType, EffectType
-import modules.mathutils as mu
 import time
 import datetime
 import requests as req
 import math
+import numpy as np
 
 class Clock(LightEffect):
     def __init__(self, renderer, coords):
@@ -20,15 +20,9 @@ class Clock(LightEffect):
             print(f"Error fetching time: {e}")
             self.offset = datetime.timedelta(seconds=0)
         # calculate which pixel is the most centered
-        average_pos = (
-            sum(coord[0] for coord in coords) / len(coords),
-            sum(coord[1] for coord in coords) / len(coords)
-        )
-        self.center_pixel_coords = min(
-            coords,
-            key=lambda coord: mu.distance(coord, average_pos)
-        )
-        self.center_pixel_index = coords.index(self.center_pixel_coords)
+        average_pos = self.positions[:, :2].mean(axis=0)
+        self.center_pixel_index = int(self.spatial_index.nearest(average_pos)[1])
+        self.center_pixel_coords = coords[self.center_pixel_index]
 
         # calculate shortest distance to an edge to determine radius
         min_x = min(c[0] for c in coords)
@@ -41,6 +35,10 @@ class Clock(LightEffect):
             self.center_pixel_coords[1] - min_y,
             max_y - self.center_pixel_coords[1]
         )
+        # the lights don't move, so their distance and angle from the center are calculated only once
+        offsets = self.positions - self.positions[self.center_pixel_index]
+        self.center_distances = np.linalg.norm(offsets, axis=1)
+        self.angles = np.arctan2(offsets[:, 1], offsets[:, 0])
 
     def update(self):
         now = datetime.datetime.now(datetime.timezone.utc) + self.offset
@@ -58,27 +56,18 @@ class Clock(LightEffect):
         hands_c = self.hands_color.get()
         seconds_c = self.seconds_color.get()
 
-        for i, coord in enumerate(self.coords):
-            dist_from_center = mu.distance(coord, self.center_pixel_coords)
-            
-            # Draw frame
-            if abs(dist_from_center - self.radius) < 1:
-                self.renderer[i] = frame_c
-                continue
+        dist_from_center = self.center_distances
+        angle = self.angles
 
-            # Calculate pixel angle relative to center
-            angle = math.atan2(coord[1] - self.center_pixel_coords[1], coord[0] - self.center_pixel_coords[0])
-            
-            # Draw hands
-            on_hour = abs(angle - hour_angle) < 0.1 and dist_from_center <= hour_len
-            on_minute = abs(angle - minute_angle) < 0.1 and dist_from_center <= minute_len
-            on_second = abs(angle - second_angle) < 0.1 and dist_from_center <= second_len
+        # Draw hands
+        on_hour = (np.abs(angle - hour_angle) < 0.1) & (dist_from_center <= hour_len)
+        on_minute = (np.abs(angle - minute_angle) < 0.1) & (dist_from_center <= minute_len)
+        on_second = (np.abs(angle - second_angle) < 0.1) & (dist_from_center <= second_len)
 
-            if on_hour or on_minute:
-                self.renderer[i] = hands_c
-            elif on_second:
-                self.renderer[i] = seconds_c
-            else:
-                self.renderer[i] = (0, 0, 0)
+        # later layers are drawn over the earlier ones: seconds, hands, frame
+        self.frame[:] = 0
+        self.frame[on_second] = seconds_c
+        self.frame[on_hour | on_minute] = hands_c
+        self.frame[np.abs(dist_from_center - self.radius) < 1] = frame_c
 
-        self.renderer.show()
\ No newline at end of file
+        self.show_frame()
\ No newline at end of file
@@ -1,6 +1,6 @@
 from modules.effect import LightEffect, ParamType, EffectType
 import modules.mathutils as mu
-import time
+import numpy as np
 
 class ColorSweep(LightEffect):
     def __init__(self, renderer, coords):
@@ -11,12 +11,11 @@ class ColorSweep(LightEffect):
         self.current_pixel = self.falloff.get()
 
     def update(self):
-        self.current_pixel += 1
-        self.renderer.fill((0, 0, 0))
-        for i in range(int(self.falloff.get())):
-            brightness = 1 - (i / self.falloff.get())
-            new_color = [channel * brightness for channel in self.color.get()]
-            #print(f"Pixel: {self.current_pixel - i}, Color: {new_color}")
-            self.renderer[int(mu.wrap(self.current_pixel - i, 0, len(self.renderer) - 1))] = new_color
-        time.sleep(1 / self.speed.get())
-        self.renderer.show()
\ No newline at end of file
+        # speed is in pixels per second
+        self.current_pixel += self.speed.get() * self.delta_time
+        self.frame[:] = 0
+        trail = np.arange(int(self.falloff.get()))
+        brightness = 1 - (trail / self.falloff.get())
+        pixels = mu.wrap(self.current_pixel - trail, 0, len(self.renderer) - 1).astype(int)
+        self.frame[pixels] = brightness[:, None] * self.color.get()
+        self.show_frame()
\ No newline at end of file
@@ -1,5 +1,6 @@
 from modules.effect import LightEffect,ParamType, EffectType
 import modules.mathutils as mu
+import numpy as np
 
 class ColorSweep(LightEffect):
     def __init__(self, renderer, coords):
@@ -33,25 +34,19 @@ class ColorSweep(LightEffect):
             elif self.current_y < self.min_y - wave_width:
                 self.current_y += total_height
 
-        for i in range(len(self.renderer)):
-            y = self.coords[i][1]
-            
-            # Calculate direct distance
-            y_distance = abs(y - self.current_y)
+        y = self.positions[:, 1]
 
-            if not self.bounce.get():
-                # Calculate wrapped distance and take the minimum
-                wrapped_dist = min(abs(y - (self.current_y - total_height)), abs(y - (self.current_y + total_height)))
-                y_distance = min(y_distance, wrapped_dist)
+        # Calculate direct distance
+        y_distance = np.abs(y - self.current_y)
 
-            if y_distance > wave_width:
-                ratio = 1
-            else:
-                # calculate % of distance from the current Y to the height
-                ratio = y_distance / wave_width
+        if not self.bounce.get():
+            # Calculate wrapped distance and take the minimum
+            wrapped_dist = np.minimum(np.abs(y - (self.current_y - total_height)), np.abs(y - (self.current_y + total_height)))
+            y_distance = np.minimum(y_distance, wrapped_dist)
 
-            # Linear interpolation between active_color and background_color
-            new_color = mu.color_lerp(self.active_color.get(), self.background_color.get(), ratio)
-            self.renderer[i] = new_color  # Update specific point's color
+        # calculate % of distance from the current Y to the height
+        ratio = np.minimum(y_distance / wave_width, 1)
 
-        self.renderer.show()
\ No newline at end of file
+        # Linear interpolation between active_color and background_color
+        self.frame[:] = mu.lerp(np.array(self.active_color.get()), np.array(self.background_color.get()), ratio[:, None])
+        self.show_frame()
\ No newline at end of file
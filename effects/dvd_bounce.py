@@ -1,6 +1,5 @@
 from modules.effect import LightEffect, ParamType, EffectType
 import modules.mathutils as mu
-import time
 import random
 import numpy as np
 from modules.log_manager import Log
@@ -24,12 +23,10 @@ class DVDBounce(LightEffect):
             min_x + (max_x - min_x) / 2,
             min_y + (max_y - min_y) / 2,
         ]
-        self.frame_length = 1/60
-        self.edges = mu.convex_hull(coords)
+        self.edges = self.geometry.hull
 
     def update(self):
-        self.renderer.clear()
-        move_distance = self.speed.get() * self.frame_length * 150
+        move_distance = self.speed.get() * self.delta_time * 150
         # update position
         new_pos = [
             self.position[0] + self.direction[0] * move_distance,
@@ -40,7 +37,7 @@ class DVDBounce(LightEffect):
         # check bounds
         if not mu.point_in_poly(new_pos[0], new_pos[1], self.edges):
             # bounce
-            normal = mu.find_closest_edge(new_pos, self.edges)
+            normal = self.geometry.closest_hull_normal(new_pos)
             
             # formula for reflection: R-> = D-> - 2(D-> . N->)N->
             d = np.array(self.direction)
@@ -56,19 +53,8 @@ class DVDBounce(LightEffect):
             self.position = new_pos
         #Log.debug("DVD", f"Position: {self.position}, Direction: {self.direction}")
             
-        max_dist = (max(coord[1] for coord in self.coords) - min(coord[1] for coord in self.coords)) * self.size.get() / 100
-        for idx, coord in enumerate(self.coords):
-            dist = mu.distance(self.position, coord)
-            ratio = 1 - (dist / max_dist)
-            if ratio < 0:
-                ratio = 0
-            elif ratio > 1:
-                ratio = 1
-            col = self.color.get()
-            self.renderer[idx] = [
-                int(col[0] * ratio),
-                int(col[1] * ratio),
-                int(col[2] * ratio)
-            ]
-        self.renderer.show()
-        time.sleep(self.frame_length)
\ No newline at end of file
+        max_dist = self.height * self.size.get() / 100
+        dist = np.linalg.norm(self.positions[:, :2] - self.position, axis=1)
+        ratio = np.clip(1 - (dist / max_dist), 0, 1)
+        self.frame[:] = ratio[:, None] * self.color.get()
+        self.show_frame()
\ No newline at end of file
@@ -1,7 +1,7 @@
 from modules.effect import LightEffect, ParamType, EffectType
 import modules.mathutils as mu
 import colorsys
-import random
+import numpy as np
 
 class Fireplace(LightEffect):
     def __init__(self, renderer, coords):
@@ -10,49 +10,31 @@ class Fireplace(LightEffect):
         self.level = self.add_parameter("Level", ParamType.SLIDER, self.height / 2, min=0, max=self.height)
         self.speed = self.add_parameter("Speed", ParamType.SLIDER, 0.2, min=0.1, max=0.5, step=0.05)
         self.amount = self.add_parameter("Particle Amount", ParamType.SLIDER, 10, min=1, max=10, step=1)
-        self.hue = [0 for i in range(len(self.renderer))] # float showing the hue
-        self.lights = [0 for i in range(len(self.renderer))] # float showing the brightness
+        self.hue = np.zeros(len(self.renderer)) # float showing the hue
+        self.lights = np.zeros(len(self.renderer)) # float showing the brightness
 
     def update(self):
-        top_distance = self.height - self.level.get()
+        level = self.level.get()
         normalized_rgb = [channel / 255 for channel in self.color.get()]
         base_hue = colorsys.rgb_to_hsv(normalized_rgb[0], normalized_rgb[1], normalized_rgb[2])[0]
-        max_particles = int(self.amount.get())  # Maximum allowed lit renderer
-        active_particles = 0  # Counter for actively lit renderer
-
-        turned_off_renderer = []
-        weights = []
-        for i in range(len(self.renderer)):
-            if self.coords[i][1] > self.level.get() and self.lights[i] <= 0:
-                turned_off_renderer.append(i)
-                weights.append(1 / ((self.coords[i][1] - self.level.get()) ** 4))
-        if len(turned_off_renderer) > 20:
-            for i in random.choices(population=turned_off_renderer, weights=weights, k=int(self.amount.get())):
-                self.hue[i] = base_hue - mu.lerp(0, 0.2, mu.clamp(mu.normalize(self.coords[i][1], self.level.get(), self.height) + random.uniform(-0.1, 0.1), 0, 1))
-                self.lights[i] = random.uniform(0.7, 1)
-
-
-        # Handle renderer
-        for i in range(len(self.renderer)):
-            if self.coords[i][1] > self.level.get():
-                # Count actively lit renderer
-                if self.lights[i] > 0:
-                    active_particles += 1
-                    self.lights[i] -= self.speed.get() / 200
-                    if self.lights[i] < 0:
-                        self.lights[i] = 0
-
-                # Set pixel color
-                new_color = tuple(mu.clamp(int(channel * 255), 0, 255) for channel in colorsys.hsv_to_rgb(self.hue[i], 1, self.lights[i]))
-                self.renderer[i] = new_color
-            else:
-                # Set renderer below self.level to base color
-                self.hue[i] = base_hue
-                self.lights[i] = 1  # Full brightness
-                new_color = tuple(int(channel * 255) for channel in colorsys.hsv_to_rgb(base_hue, 1, 1))
-                self.renderer[i] = new_color
+        y = self.positions[:, 1]
+        above = y > level
+
+        # light up random turned off lights above the level, more likely closer to it
+        turned_off = np.flatnonzero(above & (self.lights <= 0))
+        if len(turned_off) > 20:
+            weights = 1 / ((y[turned_off] - level) ** 4)
+            picks = np.random.choice(turned_off, size=int(self.amount.get()), p=weights / weights.sum())
+            height_ratio = (y[picks] - level) / max(self.height - level, 1e-9)
+            hue = base_hue - 0.2 * np.clip(height_ratio + np.random.uniform(-0.1, 0.1, len(picks)), 0, 1)
+            self.hue[picks] = np.clip(hue, 0, 1) # hsv_to_rgb_array wraps around, colorsys used to stop at red
+            self.lights[picks] = np.random.uniform(0.7, 1, len(picks))
+
+        # fade the lights above the level, the ones below are the base color
+        self.lights[above] = np.maximum(self.lights[above] - self.speed.get() / 200, 0)
+        self.hue[~above] = base_hue
+        self.lights[~above] = 1
+        self.frame[:] = mu.hsv_to_rgb_array(self.hue, 1, self.lights) * 255
 
         # Update the LED strip
-        self.renderer.show()
-
-
+        self.show_frame()
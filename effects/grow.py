@@ -1,8 +1,7 @@
 from modules.effect import LightEffect, ParamType, EffectType
-import modules.mathutils as mu
-import math
 import random
 import colorsys
+import numpy as np
 
 class Grow(LightEffect):
     def __init__(self, renderer, coords):
@@ -16,7 +15,7 @@ class Grow(LightEffect):
         self.growing = not self.growing
         if self.growing:
             self.active_color = tuple([int(channel * 255) for channel in colorsys.hsv_to_rgb(random.random(), 1, 1)])
-        self.random_point = random.choice(self.coords)
+        self.random_point = self.positions[random.randrange(len(self.positions))]
         self.current_size = 0 if self.growing else 800
 
     def update(self):
@@ -26,8 +25,9 @@ class Grow(LightEffect):
         if self.current_size <= 0:
             self.current_size = 0.1
         self.current_size = round(self.current_size, 1)
-        for i in range(len(self.renderer)):
-            active_color = [channel * (1 - mu.normalize(mu.clamp(abs(math.dist(self.coords[i], self.random_point)), 0, self.current_size), 0, self.current_size)) for channel in self.active_color]
-            #print(f"Active color: {active_color}")
-            self.renderer[i] = active_color  # Update specific point's color
-        self.renderer.show()
\ No newline at end of file
+        # only the LEDs inside the sphere are lit
+        self.frame[:] = 0
+        nearby = self.spatial_index.query_radius(self.random_point, self.current_size)
+        dist = np.linalg.norm(self.positions[nearby] - self.random_point, axis=1)
+        self.frame[nearby] = (1 - dist / self.current_size)[:, None] * self.active_color
+        self.show_frame()
\ No newline at end of file
@@ -1,7 +1,7 @@
 from modules.effect import LightEffect, ParamType, EffectType
 import math
 import random
-import time
+import numpy as np
 from modules.log_manager import Log
 
 class MeteorShower(LightEffect):
@@ -23,14 +23,13 @@ class MeteorShower(LightEffect):
         self.spawn_y = self.max_y + self.height * 0.1  # Spawn above
         self.meteors = []
         self.spawn_cooldown = 0
-        self.frame_length = 1/60
 
     def update(self):
-        self.renderer.clear()
+        self.frame[:] = 0
         bound_y = self.min_y - self.height * self.trail_length.get() / 100  # don't need the top y bound
         bound_min_x = self.min_x - self.height * self.trail_length.get() / 100
         bound_max_x = self.max_x + self.height * self.trail_length.get() / 100
-        move_distance = self.speed.get() * self.frame_length * 150
+        move_distance = self.speed.get() * self.delta_time * 150
         move_vector = [
             -math.sin(math.radians(self.angle.get())) * move_distance,
             -math.cos(math.radians(self.angle.get())) * move_distance,
@@ -50,7 +49,8 @@ class MeteorShower(LightEffect):
             #print("Spawning meteor")
             self.meteors.append([random.randint(int(self.spawn_min_x), int(self.spawn_max_x)), self.spawn_y, 0])
             self.spawn_cooldown = self.spawn_delay
-        for meteor in self.meteors:
+        col = self.color.get()
+        for meteor in list(self.meteors):
             # Update meteor position
             meteor[0] += move_vector[0]
             meteor[1] += move_vector[1]
@@ -65,60 +65,31 @@ class MeteorShower(LightEffect):
                 0
             ]
             #self.renderer.debug_draw.line(meteor, tail, (255,255,255))
-            t = tail
-            m = meteor
-            for idx, coord in enumerate(self.coords):
-                # formula I calculated, hopefully correct
-                # distance from point to the line Meteor-Tail
-                l = coord
-                dx = t[0] - m[0]
-                dy = t[1] - m[1]
-                # Numerator of the distance formula
-                numerator = abs(dy * (l[0] - m[0]) - dx * (l[1] - m[1]))
-                # Denominator of the distance formula (length of the trail)
-                denominator = math.sqrt(dx**2 + dy**2)
-                if denominator == 0: continue # Avoid division by zero
-                dist = numerator / denominator
+            m = np.array(meteor[:2])
+            # Vector of the meteor trail (head to tail), its length is the denominator of the distance formula
+            mt_vec = np.array(tail[:2]) - m
+            trail_len = math.sqrt(mt_vec[0]**2 + mt_vec[1]**2)
+            if trail_len == 0: continue # Avoid division by zero
+            # only the lights close to the meteor trail are checked
+            nearby = self.spatial_index.query_segment(meteor, tail, self.thickness.get())
+            # Vectors from meteor head to the lights
+            ml_vec = self.positions[nearby, :2] - m
+            # formula I calculated, hopefully correct
+            # distance from point to the line Meteor-Tail
+            dist = np.abs(mt_vec[1] * ml_vec[:, 0] - mt_vec[0] * ml_vec[:, 1]) / trail_len
 
-                if dist < self.thickness.get():
-                    # Vector from meteor head to the light
-                    ml_vec = (l[0] - m[0], l[1] - m[1])
-                    # Vector of the meteor trail (head to tail)
-                    mt_vec = (t[0] - m[0], t[1] - m[1])
+            # Project ml_vec onto mt_vec to see if the light is behind the head
+            # If the dot product is negative, the light is in front of the meteor head
+            on_trail = (dist < self.thickness.get()) & (ml_vec @ mt_vec >= 0)
 
-                    # Project ml_vec onto mt_vec to see if the light is behind the head
-                    dot_product = ml_vec[0] * mt_vec[0] + ml_vec[1] * mt_vec[1]
+            # calculate brightness based on ratio of distance from M to T
+            dist_ml_sq = np.einsum("ij,ij->i", ml_vec[on_trail], ml_vec[on_trail])
+            # Ensure the projection is on the segment using pythagoras
+            # and avoid sqrt domain error
+            dist_on_line = np.sqrt(np.maximum(dist_ml_sq - dist[on_trail]**2, 0))
 
-                    # If the dot product is negative, the light is in front of the meteor head
-                    if dot_product < 0:
-                        continue
-
-                    # calculate brightness based on ratio of distance from M to T
-                    dist_ml_sq = (l[0] - m[0])**2 + (l[1] - m[1])**2
-
-                    # Ensure the projection is on the segment using pythagoras
-                    # and avoid sqrt domain error
-                    if dist_ml_sq < dist**2:
-                        dist_on_line = 0
-                    else:
-                        dist_on_line = math.sqrt(dist_ml_sq - dist**2)
-
-                    # Total length of the meteor trail
-                    trail_len = math.sqrt((t[0] - m[0])**2 + (t[1] - m[1])**2)
-                    if trail_len == 0: continue
-
-                    # Ratio along the trail
-                    ratio = 1 - (dist_on_line / trail_len)
-                    if ratio < 0: # No need to check for > 1 with the dot product check
-                        ratio = 0
-                    col = self.color.get()
-                    self.renderer[idx] = [
-                        int(col[0] * ratio),
-                        int(col[1] * ratio),
-                        int(col[2] * ratio)
-                    ]
-                else:
-                    continue
-        self.renderer.show()
-        self.spawn_cooldown -= self.frame_length
-        time.sleep(self.frame_length)
\ No newline at end of file
+            # Ratio along the trail, no need to check for > 1 with the dot product check
+            ratio = np.maximum(1 - (dist_on_line / trail_len), 0)
+            self.frame[nearby[on_trail]] = ratio[:, None] * col
+        self.show_frame()
+        self.spawn_cooldown -= self.delta_time
\ No newline at end of file
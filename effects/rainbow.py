@@ -1,7 +1,5 @@
 from modules.effect import LightEffect, ParamType, EffectType
 import modules.mathutils as mu
-import time
-import colorsys
 
 class Rainbow(LightEffect):
     def __init__(self, renderer, coords):
@@ -12,10 +10,9 @@ class Rainbow(LightEffect):
 
     def update(self):
         #print(f"Running rainbow with speed {self.speed.get()} and reverse {self.reverse.get()}")
-        self.current_y += (-1 if self.reverse.get() else 1) * self.speed.get() / 10
+        self.current_y += (-1 if self.reverse.get() else 1) * self.speed.get() / 10 * self.delta_time * 60
         if self.current_y > self.height:
             self.current_y = 0
-        for i in range(len(self.renderer.leds)):
-            normalized_rgb = list(colorsys.hsv_to_rgb(mu.normalize(mu.wrap(self.coords[i][1] - self.current_y, 0, self.height), 0, self.height), 1, 1))
-            self.renderer.leds[i] = tuple([int(channel * 255) for channel in normalized_rgb])
-        self.renderer.show()
\ No newline at end of file
+        hue = mu.normalize(mu.wrap(self.positions[:, 1] - self.current_y, 0, self.height), 0, self.height)
+        self.frame[:] = mu.hsv_to_rgb_array(hue, 1, 1) * 255
+        self.show_frame()
\ No newline at end of file
@@ -1,30 +1,20 @@
 from modules.effect import LightEffect, ParamType, EffectType
-import random
+import numpy as np
 
 class Sparkles(LightEffect):
     def __init__(self, renderer, coords):
         super().__init__(renderer, coords, "Sparkles", EffectType.UNIVERSAL)
-        self.color = self.add_parameter("Color", ParamType.COLOR, "#FF0000"),
+        self.color = self.add_parameter("Color", ParamType.COLOR, "#FF0000")
         self.speed = self.add_parameter("Speed", "slider", 20, min=1, max=100, step=1)
         self.amount = self.add_parameter("Amount", "slider", 1, min=1, max=10, step=1)
-        self.states = [0] * len(self.renderer)
+        self.states = np.zeros(len(self.renderer))
 
     def update(self):
-        off_lights = []
-        for i in range(len(self.renderer)):
-            if self.states[i] == 0:
-                off_lights.append(i)
-        # randomly select amount of lights to turn on
-        for _ in range(int(self.amount.get())):
-            if len(off_lights) < 50:
-                break
-            pick = random.choice(off_lights)
-            self.states[pick] = 1
-            off_lights.remove(pick)
-        for i in range(len(self.renderer)):
-            if self.states[i] > 0:
-                self.states[i] -= self.speed.get() / 1000
-            if self.states[i] < 0:
-                self.states[i] = 0
-            self.renderer[i] = [int(channel) * self.states[i] for channel in self.color[0].get()]
-        self.renderer.show()    
\ No newline at end of file
+        off_lights = np.flatnonzero(self.states == 0)
+        # randomly select amount of lights to turn on, keeping at least 50 lights off
+        pick_count = min(int(self.amount.get()), len(off_lights) - 49)
+        if pick_count > 0:
+            self.states[np.random.choice(off_lights, size=pick_count, replace=False)] = 1
+        self.states = np.maximum(self.states - self.speed.get() / 1000, 0)
+        self.frame[:] = self.states[:, None] * self.color.get()
+        self.show_frame()
\ No newline at end of file
@@ -1,6 +1,5 @@
 from modules.effect import LightEffect, ParamType, EffectType
-import modules.mathutils as mu
-import time
+import numpy as np
 
 class StaticFour(LightEffect):
     def __init__(self, renderer, coords):
@@ -11,8 +10,9 @@ class StaticFour(LightEffect):
             self.add_parameter("Color 3", ParamType.COLOR, "#00FF00"),
             self.add_parameter("Color 4", ParamType.COLOR, "#0000FF")
         ]
+        self.color_index = np.arange(len(self.renderer)) % 4
 
     def update(self):
-        for i in range(len(self.renderer)):
-            self.renderer[i] = self.colors[i % 4].get()
-        self.renderer.show()
\ No newline at end of file
+        colors = np.array([color.get() for color in self.colors])
+        self.frame[:] = colors[self.color_index]
+        self.show_frame()
\ No newline at end of file
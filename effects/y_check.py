@@ -7,7 +7,6 @@ class YCHeck(LightEffect):
         self.maxy = max(coord[1] for coord in coords)
 
     def update(self):
-        for led in range(len(self.renderer)):
-            b = (self.coords[led][1] - self.miny) / (self.maxy - self.miny)
-            self.renderer[led] = [0, int((1 - b) * 255), 0]  # Green intensity based on y-coordinate
-        self.renderer.show()
\ No newline at end of file
+        b = (self.positions[:, 1] - self.miny) / (self.maxy - self.miny)
+        self.frame[:, 1] = (1 - b) * 255  # Green intensity based on y-coordinate
+        self.show_frame()
\ No newline at end of file
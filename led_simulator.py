@@ -10,6 +10,7 @@ import threading
 import json
 import traceback
 from modules.config_manager import Config
+import modules.frame_protocol as protocol
 import sys
 
 # set working directory to the directory of this file
@@ -32,8 +33,8 @@ class LedSimulator:
         self.coords = self.current_setup.coords
         self.num_points = len(self.coords)
 
-        # Initialize colors as white (RGB: [255, 255, 255])
-        self.colors = [[0, 0, 0] for _ in self.coords]
+        # Initialize colors as black
+        self.colors = np.zeros((self.num_points, 3), dtype=np.uint8)
         self.debug_elements = []
         self.debug_actors = []
         self.sock = self._connect_to_server()  # wait until connected
@@ -43,7 +44,7 @@ class LedSimulator:
         
         # Create plotter and point cloud after connection succeeded
         self.cloud = pv.PolyData(self.coords, force_float=False)
-        self.cloud["colors"] = np.array(self.colors, dtype=np.uint8)
+        self.cloud["colors"] = self.colors
         self.plotter = pv.Plotter()
         self.plotter.background_color = "#242424"
         #self.plotter.background_color = "#FFFFFF"
@@ -84,13 +85,8 @@ class LedSimulator:
 
     # Function to update colors dynamically
     def update_colors(self):
-        # print current zoom
-        # if the colors are not in range 0-255, convert them and print a warning
-        for i, color in enumerate(self.colors):
-            if not all(0 <= c <= 255 for c in color):
-                print(f"Color {color} at index {i} is out of range, converting to 0-255")
-                self.colors[i] = [max(0, min(255, int(c))) for c in color]
-        self.cloud["colors"] = np.array(self.colors, dtype=np.uint8)
+        # colors arrive as uint8, so they are always in the 0-255 range
+        self.cloud["colors"] = self.colors
         self.plotter.update_scalars(self.cloud["colors"])  # Efficiently update colors
         self.draw_debug_elements(self.debug_elements)
         self.plotter.update()
@@ -141,26 +137,39 @@ class LedSimulator:
                 print(f"Failed: {e}")
                 time.sleep(1)
                 
+    def _handle_message(self, msg_type, payload):
+        if msg_type == protocol.MSG_FRAME:
+            colors = protocol.unpack_frame(payload)
+            # ignore frames for a different setup, the setup change will be picked up by check_setup
+            if len(colors) == self.num_points:
+                self.colors = colors
+        elif msg_type == protocol.MSG_DELTA:
+            # apply the changes to a copy, so the plot never shows a half-applied frame
+            colors = self.colors.copy()
+            protocol.apply_delta(colors, payload)
+            self.colors = colors
+        elif msg_type == protocol.MSG_DEBUG:
+            self.debug_elements = protocol.unpack_debug(payload)
+
     def _receive_loop(self):
-        buffer = ""
-        decoder = json.JSONDecoder()
+        reader = protocol.MessageReader()
         while True:
             try:
-                data = self.sock.recv(4096)
+                data = self.sock.recv(65536)
                 if not data:
                     break
-                buffer += data.decode("utf-8")
-                
-                while buffer:
+                try:
+                    messages = reader.feed(data)
+                except protocol.ProtocolError as e:
+                    print(f"Skipping invalid data: {e}")
+                    reader.reset() # continue from the next message
+                    continue
+                for msg_type, payload in messages:
                     try:
-                        received, idx = decoder.raw_decode(buffer)
-                        # Extract LED colors from the received data
-                        self.colors = received.get("leds", self.colors)  # Use .get() to provide a default value in case "leds" key is missing
-                        self.debug_elements = received.get("debug_elements", [])
-                        buffer = buffer[idx:].lstrip()
-                    except json.JSONDecodeError:
-                        # Incomplete JSON object, wait for more data
-                        break
+                        self._handle_message(msg_type, payload)
+                    except protocol.ProtocolError as e:
+                        # e.g. a delta for the previous setup, dropped like the frames of a different size
+                        print(f"Skipping message: {e}")
             except ConnectionResetError:
                 print("Connection closed by server.")
                 break
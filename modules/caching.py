@@ -1,6 +1,9 @@
 import os
 import zlib
+import zipfile
 import inspect
+import hashlib
+import numpy as np
 
 CACHE_DIR = ".cache"
 
@@ -25,6 +28,22 @@ def hash_module(module) -> str:
             src = f.read()
     return hash_data(src)
 
+def hash_file(file_path: str) -> str:
+    """
+    Generate a hash for the contents of a file, without importing or parsing it.
+    """
+    with open(file_path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def hash_array(array: np.ndarray) -> str:
+    """
+    Generate a hash for the contents of a numpy array, much faster than hash_data for big arrays.
+    """
+    array = np.ascontiguousarray(array)
+    h = hashlib.sha1(f"{array.dtype.str}{array.shape}".encode("utf-8"))
+    h.update(array.tobytes())
+    return h.hexdigest()
+
 def set_cache_by_name(path: str, name: str, cache_data: str):
     """
     Set a cache value by name in the specified path.
@@ -67,4 +86,78 @@ def get_cache_by_data(path: str, key_data: any) -> str:
     if os.path.exists(cache_file):
         with open(cache_file, "r") as f:
             return f.read()
-    return None
\ No newline at end of file
+    return None
+
+def set_array_cache_by_name(path: str, name: str, arrays: dict[str, np.ndarray]):
+    """
+    Set a cache of numpy arrays by name in the specified path.
+    """
+    dir_path = os.path.join(CACHE_DIR, path)
+    os.makedirs(dir_path, exist_ok=True)
+    file_path = os.path.join(dir_path, f"{name}.npz")
+    # write to a temporary file first, so an interrupted write or another process writing the same cache
+    # never leaves a half written file behind
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, file_path)
+
+def get_array_cache_by_name(path: str, name: str) -> dict[str, np.ndarray] | None:
+    """
+    Get a cache of numpy arrays by name from the specified path.
+    """
+    cache_file = os.path.join(CACHE_DIR, path, f"{name}.npz")
+    if os.path.exists(cache_file):
+        try:
+            with np.load(cache_file) as data:
+                return {key: data[key] for key in data.files}
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+            # corrupted cache file (e.g. interrupted write), treat it as missing
+            return None
+    return None
+
+
+def set_mapped_cache_by_name(path: str, name: str, arrays: dict[str, np.ndarray]):
+    """
+    Set a cache of numpy arrays by name in the specified path, stored as .npy files which can be memory-mapped.
+    """
+    dir_path = os.path.join(CACHE_DIR, path)
+    os.makedirs(dir_path, exist_ok=True)
+    for key, array in arrays.items():
+        file_path = os.path.join(dir_path, f"{name}.{key}.npy")
+        # write to a temporary file first, so a reader never maps a half written file
+        with open(f"{file_path}.tmp", "wb") as f:
+            np.save(f, array)
+        os.replace(f"{file_path}.tmp", file_path)
+
+def get_mapped_cache_by_name(path: str, name: str, keys: list[str]) -> dict[str, np.ndarray] | None:
+    """
+    Get a cache of numpy arrays by name from the specified path, memory-mapped read-only instead of loaded.
+    """
+    arrays = {}
+    for key in keys:
+        file_path = os.path.join(CACHE_DIR, path, f"{name}.{key}.npy")
+        if not os.path.exists(file_path):
+            return None
+        try:
+            arrays[key] = np.load(file_path, mmap_mode="r")
+        except (OSError, ValueError):
+            # corrupted cache file, treat it as missing
+            return None
+    return arrays
+
+def clear_cache(path: str, keep: set[str] = frozenset()):
+    """
+    Remove all cache files in the specified path, except the ones named in keep (without the extensions).
+    Folders inside the path are left alone.
+    """
+    dir_path = os.path.join(CACHE_DIR, path)
+    if not os.path.isdir(dir_path):
+        return
+    for file_name in os.listdir(dir_path):
+        if file_name.split(".", 1)[0] in keep or os.path.isdir(os.path.join(dir_path, file_name)):
+            continue
+        try:
+            os.remove(os.path.join(dir_path, file_name))
+        except OSError:
+            pass # still mapped on systems which don't allow removing open files, replaced next time
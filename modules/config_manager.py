@@ -5,6 +5,8 @@ import os
 class Config:
     _instance = None
     CONFIG_PATH = "config/server_config.json"
+    # target frame rate of effects and lightshows for each performance mode
+    PERFORMANCE_FPS = {"low": 20, "normal": 30, "high": 60}
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
@@ -28,4 +30,9 @@ class Config:
 
     def save(self):
         with open(self.CONFIG_PATH, 'w') as file:
-            json.dump(self.config, file, indent=4)
\ No newline at end of file
+            json.dump(self.config, file, indent=4)
+
+    def target_fps(self) -> int:
+        """Frame rate selected by the performance_mode setting."""
+        performance_mode = self.config.get("performance_mode", "normal")
+        return self.PERFORMANCE_FPS.get(performance_mode, self.PERFORMANCE_FPS["normal"])
@@ -1,4 +1,7 @@
 from modules.mathutils import Bounds
+import numpy as np
+from modules.spatial_index import SpatialIndex
+from modules.geometry import SetupGeometry
 
 class Parameter:
     """Class to store parameter metadata and value."""
@@ -59,6 +62,11 @@ class LightEffect:
         self.parameters = {}
         self.height = max([coord[1] for coord in coords]) - min([coord[1] for coord in coords])
         self.bounds = Bounds(self.coords)
+        self.delta_time = 1 / 30 # seconds since the previous update(), set by the effect runner
+        # array API: positions of the LEDs and a float frame to draw into, shown with show_frame()
+        self.positions = np.zeros((len(coords), 3), dtype=np.float64)
+        self.positions[:, :len(coords[0])] = coords
+        self.frame = np.zeros((len(coords), 3), dtype=np.float64)
         #print(f"Height: {self.height}")
 
     def add_parameter(self, name, param_type, default_value, **kwargs):
@@ -70,6 +78,21 @@ class LightEffect:
         """Return all parameters."""
         return {name: param.__dict__ for name, param in self.parameters.items()}
 
+    @property
+    def spatial_index(self) -> SpatialIndex:
+        """KD-tree of the coordinates for finding the LEDs near a point or a line, shared by all effects."""
+        return SpatialIndex.for_coords(self.coords)
+
+    @property
+    def geometry(self) -> SetupGeometry:
+        """Precomputed geometry of the coordinates (normalized, polar, convex hull), shared by all effects."""
+        return SetupGeometry.for_coords(self.coords)
+
+    def show_frame(self):
+        """Show self.frame on the lights. Values are clipped to 0-255 and truncated to integers."""
+        self.renderer.set_frame(self.frame)
+        self.renderer.show()
+
     def update(self):
         """Update the LED effect (override in subclasses)."""
         raise NotImplementedError("Update method must be implemented by subclasses.")
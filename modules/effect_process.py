@@ -0,0 +1,223 @@
+"""
+Runs an effect in a separate process, so CPU heavy effects don't compete for the GIL with the web server.
+
+The worker process draws into a shared memory frame buffer and notifies the main process over a pipe,
+the main process only copies the newest frame into the renderer. Parameter changes go the other way
+over a second pipe.
+
+Shared memory layout: sequence number (uint64) | frame slot 0 | frame slot 1
+Frame n is written into slot n % 2 and published by setting the sequence number to n, so the reader
+always has a complete frame to copy while the worker draws the next one.
+"""
+import importlib
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from modules.led_renderer import FrameBuffer, LEDRenderer
+from modules.effect import Parameter
+from modules.frame_clock import FrameClock
+from modules.log_manager import Log
+from modules.metrics import Metrics
+
+SEQUENCE_SIZE = np.dtype(np.uint64).itemsize
+
+def _shared_arrays(buffer, led_count: int) -> tuple[np.ndarray, list[np.ndarray]]:
+    """
+    Map the sequence number and the two frame slots onto a shared memory buffer.
+    """
+    sequence = np.ndarray((1,), dtype=np.uint64, buffer=buffer)
+    slots = [
+        np.ndarray((led_count, 3), dtype=np.uint8, buffer=buffer, offset=SEQUENCE_SIZE + slot * led_count * 3)
+        for slot in range(2)
+    ]
+    return sequence, slots
+
+
+class SharedFrameRenderer(FrameBuffer):
+    """
+    Renderer used by effects inside the worker process, show() publishes the frame to the shared memory.
+    """
+    def __init__(self, buffer, led_count: int, frame_conn):
+        super().__init__(led_count)
+        self.debug_draw = LEDRenderer.DebugDraw()
+        self._sequence, self._slots = _shared_arrays(buffer, led_count)
+        self._frame_conn = frame_conn
+
+    def show(self):
+        frame_number = int(self._sequence[0]) + 1
+        np.copyto(self._slots[frame_number % 2], self.leds)
+        self._sequence[0] = frame_number
+        self._frame_conn.send(("frame", self.debug_draw._get_elements()))
+
+
+def _effect_worker(module_name, class_name, coords, parameters, fps, shm_name, log_file, frame_conn, control_conn):
+    """
+    Entry point of the worker process: runs the effect at the given FPS until told to stop.
+    """
+    Log._current_log_file = log_file # log into the same file as the server
+    shm = shared_memory.SharedMemory(name=shm_name)
+    renderer = None
+    try:
+        renderer = SharedFrameRenderer(shm.buf, len(coords), frame_conn)
+        effect_class = getattr(importlib.import_module(module_name), class_name)
+        effect = effect_class(renderer, coords)
+        for name, value in parameters.items():
+            if name in effect.parameters:
+                effect.parameters[name].set(value)
+        clock = FrameClock(fps, f"EffectProcess:{class_name}")
+        while True:
+            while control_conn.poll():
+                message = control_conn.recv()
+                if message[0] == "stop":
+                    return
+                elif message[0] == "set_parameter" and message[1] in effect.parameters:
+                    effect.parameters[message[1]].set(message[2])
+                elif message[0] == "set_fps":
+                    clock.set_fps(message[1])
+            effect.delta_time = clock.delta_time
+            update_start = time.perf_counter()
+            effect.update()
+            frame_conn.send(("stats", time.perf_counter() - update_start, clock.overrun))
+            clock.tick()
+    except (EOFError, BrokenPipeError):
+        pass # the main process is gone
+    except Exception as e:
+        Log.error_exc("EffectProcess", e)
+        try:
+            frame_conn.send(("error", str(e)))
+        except (EOFError, BrokenPipeError):
+            pass
+    finally:
+        del renderer # release the views of the shared memory before closing it
+        shm.close()
+
+
+class EffectModel:
+    """
+    Stand-in for an effect running in a worker process, so the main process doesn't have to create it too.
+    Holds the name and the parameters built from the effect metadata (LightEffect.get_parameters).
+    """
+    def __init__(self, effect_name: str, parameters: dict):
+        self.effect_name = effect_name
+        self.parameters = {
+            name: Parameter(param["name"], param["param_type"], param["value"], **param["options"])
+            for name, param in parameters.items()
+        }
+
+
+class EffectProcess:
+    """
+    Runs an effect class in a worker process and shows its frames on the renderer.
+    The class is given by its module and name, it's only imported in the worker.
+    """
+    START_METHOD = "spawn" # a forked copy of the server would inherit its threads and locks in whatever state they were
+    STOP_TIMEOUT = 2
+
+    def __init__(self, renderer, module_name: str, class_name: str, effect_name: str, coords: list, parameters: dict, fps: float):
+        self.renderer = renderer
+        self.effect_name = effect_name
+        led_count = len(coords)
+        self._shm = shared_memory.SharedMemory(create=True, size=SEQUENCE_SIZE + 2 * led_count * 3)
+        self._sequence, self._slots = _shared_arrays(self._shm.buf, led_count)
+        self._sequence[0] = 0
+        self._frame = np.zeros((led_count, 3), dtype=np.uint8)
+        context = multiprocessing.get_context(self.START_METHOD)
+        frame_receiver, frame_sender = context.Pipe(duplex=False)
+        control_receiver, self._control_conn = context.Pipe(duplex=False)
+        self._frame_conn = frame_receiver
+        self._process = context.Process(
+            target=_effect_worker,
+            args=(module_name, class_name, coords, parameters, fps,
+                  self._shm.name, Log._current_log_file, frame_sender, control_receiver),
+            daemon=True,
+            name=f"effect-{effect_name}",
+        )
+        self._update_time = Metrics().histogram("effect_update_seconds", engine="EffectsEngine", effect=effect_name)
+        self._overruns = Metrics().counter("frame_overruns_total", engine="EffectsEngine", effect=effect_name)
+        self._process.start()
+        # the worker owns these ends now
+        frame_sender.close()
+        control_receiver.close()
+        self._running = True
+        self._stopping = False
+        self._receiver_thread = threading.Thread(target=self._receive_frames, daemon=True)
+        self._receiver_thread.start()
+        Log.info("EffectProcess", f"Running effect {effect_name} in process {self._process.pid}.")
+
+    def set_parameter(self, name: str, value):
+        self._send(("set_parameter", name, value))
+
+    def set_fps(self, fps: float):
+        self._send(("set_fps", fps))
+
+    def _send(self, message):
+        try:
+            self._control_conn.send(message)
+        except (OSError, BrokenPipeError):
+            Log.warn("EffectProcess", f"Effect process of {self.effect_name} isn't running.")
+
+    def stop(self):
+        """
+        Stop the worker process and release the shared memory.
+        """
+        self._stopping = True
+        if self._process.is_alive():
+            self._send(("stop",))
+        # the receiver thread keeps reading meanwhile, so the worker can't get stuck on a full pipe
+        self._process.join(self.STOP_TIMEOUT)
+        if self._process.is_alive():
+            Log.warn("EffectProcess", f"Effect process of {self.effect_name} didn't stop in time, terminating it.")
+            self._process.terminate()
+            self._process.join()
+        self._running = False
+        if threading.current_thread() != self._receiver_thread:
+            self._receiver_thread.join()
+        self._control_conn.close()
+        self._frame_conn.close()
+        del self._sequence, self._slots
+        self._shm.close()
+        self._shm.unlink()
+
+    def _read_frame(self) -> bool:
+        """
+        Copy the newest published frame into self._frame. Returns False if the worker overwrote it meanwhile.
+        """
+        frame_number = int(self._sequence[0])
+        np.copyto(self._frame, self._slots[frame_number % 2])
+        # the worker starts overwriting this slot only after publishing the next frame, if the sequence
+        # number didn't change, the copy is complete
+        return int(self._sequence[0]) == frame_number
+
+    def _receive_frames(self):
+        while self._running:
+            try:
+                if not self._frame_conn.poll(0.5):
+                    if not self._process.is_alive():
+                        if not self._stopping:
+                            Log.error("EffectProcess", f"Effect process of {self.effect_name} exited unexpectedly.")
+                        break
+                    continue
+                # handle everything that arrived, several frames may be waiting if the renderer is slow
+                debug_elements = []
+                new_frame = False
+                while self._frame_conn.poll():
+                    message = self._frame_conn.recv()
+                    if message[0] == "frame":
+                        debug_elements += message[1]
+                        new_frame = True
+                    elif message[0] == "stats":
+                        self._update_time.observe(message[1])
+                        if message[2]:
+                            self._overruns.inc()
+                    elif message[0] == "error":
+                        Log.error("EffectProcess", f"Effect {self.effect_name} crashed: {message[1]}")
+            except (EOFError, OSError):
+                break
+            if new_frame and not self._stopping:
+                while not self._read_frame():
+                    pass
+                self.renderer.set_frame(self._frame)
+                self.renderer.debug_draw.debug_elements += debug_elements
+                self.renderer.show()
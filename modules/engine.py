@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from modules.setup import Setup
 import threading
 import time
+from modules.metrics import Metrics
 
 class Engine(ABC):
     """
@@ -296,6 +297,9 @@ class AudioEngine(Engine):
         Returns:
             None
         """
+        engine_name = type(self).__name__
+        frame_time = Metrics().histogram("engine_frame_seconds", engine=engine_name)
+        overruns = Metrics().counter("frame_overruns_total", engine=engine_name)
         while not self._stop_flag:
             elapsed = self._time.monotonic() - self.playback_start_time
             self.current_time = self.seek_time_at_start + elapsed
@@ -303,7 +307,12 @@ class AudioEngine(Engine):
             if self.current_time >= self.audio_length:
                 break
 
+            frame_start = self._time.perf_counter()
             self.on_frame(self.current_time)
+            frame_duration = self._time.perf_counter() - frame_start
+            frame_time.observe(frame_duration)
+            if frame_duration > 1 / self.FPS:
+                overruns.inc()
             
             self._time.sleep(1 / self.FPS)
 
@@ -9,8 +9,7 @@ class CanvasEngine(Engine):
         self.state = [(0, 0, 0)] * len(renderer)
 
     def on_enable(self):
-        for pix in range(len(self.renderer)):
-            self.renderer[pix] = self.state[pix]
+        self.renderer.set_colors(self.state)
         self.renderer.show()
         Log.info("CanvasEngine", "CanvasEngine enabled.")
 
@@ -33,8 +32,7 @@ class CanvasEngine(Engine):
             return
         #Log.debug("CanvasEngine", pixel_list)
         self.state = pixel_list
-        for pix in range(len(self.renderer)):
-            self.renderer[pix] = self.state[pix]
+        self.renderer.set_colors(self.state)
         self.renderer.show()
         Log.debug("CanvasEngine", "renderer updated.")
     
\ No newline at end of file
@@ -1,7 +1,9 @@
 import os
 import json
 import importlib
-from threading import Thread
+import multiprocessing
+import multiprocessing.connection
+from threading import Thread, Lock
 
 from modules.engine import Engine
 from modules.engine_manager import EngineManager
@@ -10,8 +12,52 @@ from modules.config_manager import Config
 from modules.effect import EffectType
 from modules.log_manager import Log
 from modules.led_renderer import DummyRenderer
+from modules.frame_clock import FrameClock
+from modules.effect_process import EffectProcess, EffectModel
+from modules.layer_stack import LayerStack, LayerBuffer, Layer, BlendMode, Crossfade
 import modules.caching as cache
+from modules.metrics import Metrics
+import time
 import traceback
+import numpy as np
+
+def find_effect_class(module) -> type | None:
+    """Return the LightEffect subclass defined in an effect module, or None if there's none."""
+    effect_class = None
+    for attr in dir(module):
+        cls = getattr(module, attr)
+        if hasattr(module, "LightEffect") and isinstance(cls, type) and issubclass(cls, module.LightEffect) and cls is not module.LightEffect:
+            effect_class = cls
+    return effect_class
+
+
+def _validate_effect_worker(module_name, setup, log_file, conn):
+    """Entry point of the validation processes: checks the effect doesn't throw any immediate exceptions.
+    Sends ("started", None) once the process is up, then ("valid", metadata) if it's valid,
+    ("not_effect", None) if the module has no effect class, otherwise ("invalid", error message)."""
+    Log._current_log_file = log_file
+    conn.send(("started", None)) # the time limit counts from here, not from starting the interpreter
+    try:
+        cls = find_effect_class(importlib.import_module(module_name))
+        if cls is None:
+            conn.send(("not_effect", None))
+            return
+        if not hasattr(cls, "update") or not callable(cls.update):
+            raise TypeError(f"Effect class {cls.__name__} must implement an 'update' method.")
+        effect_instance = cls(DummyRenderer(setup), setup.coords)
+        effect_instance.update()  # Call update to check for runtime errors
+        metadata = {
+            "class_name": cls.__qualname__,
+            "display_name": effect_instance.display_name,
+            "effect_type": effect_instance.effect_type,
+            "parameters": effect_instance.get_parameters(),
+        }
+    except Exception as e:
+        Log.error_exc("EffectsEngine", e)
+        conn.send(("invalid", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("valid", metadata))
+
 
 class EffectsEngine(Engine):
     """
@@ -19,13 +65,37 @@ class EffectsEngine(Engine):
     """
 
     SETUP_FOLDER = "config/setups"
+    VALIDATION_TIMEOUT = 10 # seconds an effect gets to start up and draw its first frame
+    VALIDATION_STARTUP_TIMEOUT = 120 # seconds a validation process gets to start, slow on a busy Pi
+    VALIDATION_PROCESSES = os.cpu_count() or 1
+    PREFETCH_COUNT = 3 # recently used effects imported in the background after enabling
 
     def __init__(self, renderer, init_setup):
         self.renderer = renderer
         self.current_effect = None
-        self.effects = {}
+        self.effects = {} # effect name -> module name, for all valid effects, imported only when needed
+        self.effect_classes = {} # effect name -> class, for the imported effects
+        self.imported_hashes = {} # module name -> hash of the file when it was imported
+        self.import_lock = Lock()
+        # effect file hash -> class_name, display_name, effect_type and parameters (per coordinates hash, some depend on the setup)
+        self.manifest = {}
+        self.effect_hashes = {} # effect name -> file hash
         self.running = False
         self.runner_thread = None
+        self.clock = FrameClock(Config().target_fps(), "EffectsEngine")
+        # "thread" runs effects in the server process, "process" in a worker process with its own GIL
+        self.execution_mode = Config().config.get("effect_execution", "thread")
+        self.effect_process = None
+        # in thread mode effects draw into effect_buffer, the layers are blended over it and the result is shown
+        self.effect_buffer = None
+        self.layer_stack = None
+        # effect changes in thread mode: the new effect is created in the background and handed to the runner
+        # through next_transition, the runner then crossfades to it and makes it the current effect
+        self.transition_lock = Lock()
+        self.next_transition = None # (effect, buffer)
+        self.incoming_effect = None
+        self.crossfade = None
+        self._effect_request = 0 # id of the latest set_effect, older effects still being created are dropped
 
         # file storing current effect, parameters and current setup
         # load current setup
@@ -37,29 +107,35 @@ class EffectsEngine(Engine):
         self.load_effects()
         effect_name = Config().config.get("current_effect")
         if effect_name in self.effects:
-            self.current_effect = self.effects[effect_name](self.renderer, self.coords)
-            # load parameters
-            for param in self.current_effect.parameters.values():
-                last_value = Config().config.get("parameters", {}).get(effect_name, {}).get(param.name)
-                if last_value is not None:
-                    param.set(last_value)
+            self.current_effect = self._create_effect(effect_name, self._effect_renderer())
         else:
             # set to first effect
             if self.effects:
                 effect_name = list(self.effects.keys())[0]
-                self.current_effect = list(self.effects.values())[0](self.renderer, self.coords)
+                self.current_effect = self._create_effect(effect_name, self._effect_renderer())
                 Config().config["current_effect"] = effect_name
                 Config().save()
+        self._load_layers()
+        Thread(target=self.prefetch_effects, daemon=True).start()
 
         self.running = True
-        self.runner_thread = Thread(target=self.effect_runner, daemon=True)
-        self.runner_thread.start()
+        if self.execution_mode == "process":
+            self._start_effect_process(effect_name)
+        else:
+            self.runner_thread = Thread(target=self.effect_runner, daemon=True)
+            self.runner_thread.start()
 
     def on_disable(self):
         Log.info("EffectsEngine", "EffectsEngine disabled.")
         self.running = False
         if self.runner_thread:
             self.runner_thread.join()
+            self.runner_thread = None
+        self._stop_effect_process()
+        with self.transition_lock:
+            self.next_transition = None
+        if self.incoming_effect:
+            self._finish_transition()
         self.renderer.fill((0, 0, 0))
         self.renderer.show()
 
@@ -67,87 +143,307 @@ class EffectsEngine(Engine):
         Log.debug("EffectsEngine", f"Setup changed to {setup.name}")
         self.setup = setup
         self.coords = setup.coords
+        self.coords_hash = cache.hash_array(np.asarray(self.coords, dtype=np.float64))
+        if self.layer_stack is None or self.layer_stack.led_count != len(self.coords):
+            self.effect_buffer = LayerBuffer(len(self.coords), self.renderer.debug_draw)
+            self.layer_stack = LayerStack(len(self.coords))
         # reload the runner
         if(self.running):
             self.set_effect(Config().config["current_effect"])
+            self._load_layers()
 
     def get_effect_name(self, effect):
-        for name, eff_class in self.effects.items():
+        if isinstance(effect, EffectModel):
+            return effect.effect_name
+        for name, eff_class in list(self.effect_classes.items()):
             if isinstance(effect, eff_class):
                 return name
         return None
     
-    def validate_effect(self, cls) -> Exception | None:
-        """Validate if the class doesn't throw any immediate exceptions.
-        
-        Returns None if valid, otherwise returns the exception."""
-        dummy_renderer = DummyRenderer(self.setup)
-        if not hasattr(cls, "update") or not callable(cls.update):
-            return TypeError(f"Effect class {cls.__name__} must implement an 'update' method.")
-        if not hasattr(cls, "__init__") or not callable(cls.__init__):
-            return TypeError(f"Effect class {cls.__name__} must have an '__init__' method.")
-        try:
-            effect_instance = cls(dummy_renderer, self.coords)
-            effect_instance.update()  # Call update to check for runtime errors
-        except Exception as e:
-            Log.error_exc("EffectsEngine", e)
-            return e
-        return None
+    def validate_effects(self, effect_modules: dict) -> dict:
+        """Validate effect modules in parallel, each in its own process limited to VALIDATION_TIMEOUT seconds
+        from when the process has started, so an effect which hangs can't block the startup.
+        The modules aren't imported into this process.
+
+        Returns a dict of effect name -> (status, metadata or error message), see _validate_effect_worker.
+        Effects which ran out of time have the status "timeout"."""
+        context = multiprocessing.get_context(EffectProcess.START_METHOD)
+        pending = list(effect_modules.items())
+        running = {} # connection -> (effect name, process, deadline)
+        results = {}
+        while pending or running:
+            while pending and len(running) < self.VALIDATION_PROCESSES:
+                name, module_name = pending.pop(0)
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(
+                    target=_validate_effect_worker,
+                    args=(module_name, self.setup, Log._current_log_file, sender),
+                    daemon=True,
+                    name=f"validate-{name}",
+                )
+                process.start()
+                sender.close()
+                running[receiver] = (name, process, time.monotonic() + self.VALIDATION_STARTUP_TIMEOUT)
+            next_deadline = min(deadline for _, _, deadline in running.values())
+            for receiver in multiprocessing.connection.wait(list(running), max(next_deadline - time.monotonic(), 0)):
+                name, process, _ = running.pop(receiver)
+                try:
+                    result = receiver.recv()
+                except EOFError:
+                    process.join()
+                    result = ("invalid", f"Validation process exited with code {process.exitcode}.")
+                if result[0] == "started":
+                    running[receiver] = (name, process, time.monotonic() + self.VALIDATION_TIMEOUT)
+                    continue
+                results[name] = result
+                receiver.close()
+                process.join()
+            now = time.monotonic()
+            for receiver, (name, process, deadline) in list(running.items()):
+                if now >= deadline:
+                    process.terminate()
+                    process.join()
+                    receiver.close()
+                    del running[receiver]
+                    results[name] = ("timeout", f"Timed out after {self.VALIDATION_TIMEOUT} seconds.")
+        return results
 
-            
     def load_effects(self, folder="effects"):
-        """Dynamically load all effect scripts."""
+        """Find all valid effect scripts. Only new or changed files are imported (in the validation processes),
+        the rest is known from the manifest and imported when the effect is first used."""
         Log.info("EffectsEngine", "Loading and validating effects...")
         self.effects = {}
-        cached_hashes = []
-        for filename in os.listdir(folder):
+        self.effect_hashes = {}
+        # metadata of previously validated effects, keyed by their file hash
+        cache_data = cache.get_cache_by_name("effects_engine", "effect_manifest")
+        self.manifest = json.loads(cache_data) if cache_data else {}
+        uncached = {}
+        for filename in sorted(os.listdir(folder)):
             if filename.endswith(".py") and not filename.startswith("__"):
-                module_name = filename[:-3]
-                module = importlib.import_module(f"{folder}.{module_name}")
-                for attr in dir(module):
-                    cls = getattr(module, attr)
-                    # get hashed of previously cached validated effects
-                    cache_data = cache.get_cache_by_name("effects_engine", "valid_effects")
-                    if cache_data:
-                        cached_hashes = list(json.loads(cache_data))
-                    if hasattr(module, "LightEffect") and isinstance(cls, type) and issubclass(cls, module.LightEffect) and cls is not module.LightEffect:
-                        module_hash = cache.hash_module(cls)
-                        if module_hash in cached_hashes:
-                            self.effects[module_name] = cls
-                        else:
-                            Log.debug("EffectsEngine", f"Effect {module_name} isn't cached, validating...")
-                            thrown_exception = self.validate_effect(cls)
-                            if thrown_exception is None:
-                                self.effects[module_name] = cls
-                                cached_hashes.append(module_hash)
-                            else:
-                                Log.warn("EffectsEngine", f"Effect {module_name} is invalid. (Traceback above ^)")
-        # save the cache
-        cache.set_cache_by_name("effects_engine", "valid_effects", json.dumps(cached_hashes))
-            
+                name = filename[:-3]
+                module_name = f"{folder}.{name}"
+                file_hash = cache.hash_file(os.path.join(folder, filename))
+                self.effect_hashes[name] = file_hash
+                if file_hash in self.manifest:
+                    self.effects[name] = module_name
+                else:
+                    Log.debug("EffectsEngine", f"Effect {name} isn't cached, validating...")
+                    uncached[name] = module_name
+        if uncached:
+            for name, (status, result) in self.validate_effects(uncached).items():
+                if status == "valid":
+                    self.effects[name] = uncached[name]
+                    self.manifest[self.effect_hashes[name]] = {
+                        "class_name": result["class_name"],
+                        "display_name": result["display_name"],
+                        "effect_type": result["effect_type"],
+                        "parameters": {self.coords_hash: result["parameters"]},
+                    }
+                elif status == "invalid":
+                    Log.warn("EffectsEngine", f"Effect {name} is invalid: {result}")
+                elif status == "timeout":
+                    # not cached, it might have only been slow because of a busy system
+                    Log.warn("EffectsEngine", f"Effect {name} took too long to validate, it will be validated again next time: {result}")
+        # forget the effects which were removed or changed
+        valid_hashes = {self.effect_hashes[name] for name in self.effects}
+        self.manifest = {file_hash: metadata for file_hash, metadata in self.manifest.items() if file_hash in valid_hashes}
+        self._save_manifest()
+        # drop imported classes of changed files, they are imported again when used
+        with self.import_lock:
+            self.effect_classes = {name: cls for name, cls in self.effect_classes.items()
+                                   if name in self.effects and self.imported_hashes.get(self.effects[name]) == self.effect_hashes[name]}
+
         Log.info("EffectsEngine", f"Loaded {len(self.effects)} effects.")
         return self.effects
-    
+
+    def get_effect_class(self, effect_name) -> type:
+        """Return the class of an effect, importing its module the first time it's needed."""
+        with self.import_lock:
+            cls = self.effect_classes.get(effect_name)
+            if cls is None:
+                start = time.perf_counter()
+                module_name = self.effects[effect_name]
+                file_hash = self.effect_hashes[effect_name]
+                module = importlib.import_module(module_name)
+                if self.imported_hashes.get(module_name, file_hash) != file_hash:
+                    module = importlib.reload(module) # the file changed since it was imported
+                self.imported_hashes[module_name] = file_hash
+                cls = getattr(module, self.manifest[file_hash]["class_name"])
+                self.effect_classes[effect_name] = cls
+                Log.debug("EffectsEngine", f"Imported effect {effect_name} in {(time.perf_counter() - start) * 1000:.0f} ms.")
+            return cls
+
+    def prefetch_effects(self):
+        """Import the recently used effects in the background, so switching to them is quick."""
+        if self.execution_mode == "process":
+            return # the effects are imported by the worker processes
+        for effect_name in Config().config.get("recent_effects", []):
+            if effect_name in self.effects:
+                try:
+                    self.get_effect_class(effect_name)
+                except Exception as e:
+                    Log.warn("EffectsEngine", f"Couldn't prefetch effect {effect_name}: {e}")
+
+    def _save_manifest(self):
+        cache.set_cache_by_name("effects_engine", "effect_manifest", json.dumps(self.manifest))
+
+    def get_metadata(self, effect_name) -> dict:
+        """Return the cached display_name, effect_type and parameters of an effect without creating it.
+        Parameters are only created for new setups, once per effect. In process mode the effect is created
+        in a validation process for that, so it can't block or crash the server."""
+        metadata = self.manifest[self.effect_hashes[effect_name]]
+        if self.coords_hash not in metadata["parameters"]:
+            if self.execution_mode == "process":
+                status, result = self.validate_effects({effect_name: self.effects[effect_name]})[effect_name]
+                if status != "valid":
+                    raise RuntimeError(f"Couldn't get the parameters of effect {effect_name}: {result}")
+                parameters = result["parameters"]
+            else:
+                parameters = self.get_effect_class(effect_name)(DummyRenderer(self.setup), self.coords).get_parameters()
+            metadata["parameters"][self.coords_hash] = parameters
+            self._save_manifest()
+        return {
+            "display_name": metadata["display_name"],
+            "effect_type": metadata["effect_type"],
+            "parameters": metadata["parameters"][self.coords_hash],
+        }
+
+    def _effect_renderer(self):
+        """Renderer new effects draw into, unused in process mode."""
+        return self.renderer if self.execution_mode == "process" else self.effect_buffer
+
+    def _create_effect(self, effect_name, renderer):
+        """Create an effect with the parameters it had last time.
+        In process mode only its EffectModel is created here, the effect itself is created by the worker process."""
+        if self.execution_mode == "process":
+            effect = EffectModel(effect_name, self.get_metadata(effect_name)["parameters"])
+        else:
+            effect = self.get_effect_class(effect_name)(renderer, self.coords)
+        for param in effect.parameters.values():
+            last_value = Config().config.get("parameters", {}).get(effect_name, {}).get(param.name)
+            if last_value is not None:
+                param.set(last_value)
+        return effect
+
     def effect_runner(self):
-        """Runs the current effect in a loop."""
+        """Runs the current effect and the layers at the frame rate of the performance mode."""
+        self.clock.reset()
+        metrics_effect = None
+        composite_time = Metrics().histogram("layer_composite_seconds", engine="EffectsEngine")
         while self.running:
-            if self.current_effect:
+            self._start_next_transition()
+            effect = self.current_effect
+            if effect:
                 #print(f"Running effect {self.current_effect.__class__.__name__}")
-                self.current_effect.update()
+                if effect is not metrics_effect:
+                    # look the metrics up only when the effect changes, not every frame
+                    metrics_effect = effect
+                    effect_name = self.get_effect_name(effect)
+                    update_time = Metrics().histogram("effect_update_seconds", engine="EffectsEngine", effect=effect_name)
+                    overruns = Metrics().counter("frame_overruns_total", engine="EffectsEngine", effect=effect_name)
+                effect.delta_time = self.clock.delta_time
+                update_start = time.perf_counter()
+                effect.update()
+                update_time.observe(time.perf_counter() - update_start)
+                frame = self.effect_buffer.leds
+                crossfade = self.crossfade
+                if crossfade:
+                    self.incoming_effect.delta_time = self.clock.delta_time
+                    self.incoming_effect.update()
+                    frame = crossfade.blend(frame)
+                    if crossfade.finished:
+                        self._finish_transition()
+                layers = self.layer_stack.layers
+                if layers:
+                    for layer in layers:
+                        layer.effect.delta_time = self.clock.delta_time
+                        layer.effect.update()
+                    composite_start = time.perf_counter()
+                    frame = self.layer_stack.composite(frame)
+                    composite_time.observe(time.perf_counter() - composite_start)
+                self.renderer.set_frame(frame)
+                self.renderer.show()
+                self.clock.tick()
+                if self.clock.overrun:
+                    overruns.inc()
+            else:
+                self.clock.tick()
+
+    def _prepare_effect(self, effect_name, request):
+        """Create the effect and draw its first frame outside the runner, then hand it to the runner.
+        Raises the exception of the effect if it fails."""
+        buffer = LayerBuffer(len(self.coords), self.renderer.debug_draw)
+        effect = self._create_effect(effect_name, buffer)
+        effect.update() # the first update often precomputes things, better not to do it in the runner
+        with self.transition_lock:
+            if request == self._effect_request and self.running:
+                self.next_transition = (effect, buffer)
+        Log.debug("EffectsEngine", f"Effect {effect_name} is ready, fading in.")
+
+    def _start_next_transition(self):
+        """Start fading to the effect created by _prepare_effect, called by the runner."""
+        with self.transition_lock:
+            next_transition = self.next_transition
+            self.next_transition = None
+        if next_transition is None:
+            return
+        effect, buffer = next_transition
+        if buffer.led_count != self.effect_buffer.led_count:
+            return # created for a setup with a different number of LEDs
+        if self.incoming_effect:
+            self._finish_transition() # the previous fade didn't finish yet
+        self.incoming_effect = effect
+        self.crossfade = Crossfade(buffer, Config().config.get("transition_duration", 1.0))
+        if self.current_effect is None:
+            self._finish_transition()
+
+    def _finish_transition(self):
+        """Make the incoming effect the current one, the old effect is released."""
+        self.current_effect = self.incoming_effect
+        self.effect_buffer = self.crossfade.buffer
+        self.incoming_effect = None
+        self.crossfade = None
+
+    def _selected_effect(self):
+        """The effect the user selected last, the incoming one while fading."""
+        return self.incoming_effect or self.current_effect
+
+    def _start_effect_process(self, effect_name):
+        """Run the effect in a worker process, replacing the previous one.
+        current_effect is the EffectModel of the effect, holding the parameters passed to the worker."""
+        self._stop_effect_process()
+        if not self.current_effect:
+            return
+        parameters = {name: param.value for name, param in self.current_effect.parameters.items()}
+        class_name = self.manifest[self.effect_hashes[effect_name]]["class_name"]
+        self.effect_process = EffectProcess(self.renderer, self.effects[effect_name], class_name, effect_name, self.coords, parameters, self.clock.fps)
+
+    def _stop_effect_process(self):
+        if self.effect_process:
+            self.effect_process.stop()
+            self.effect_process = None
+
+    def set_fps(self, fps):
+        """Change the frame rate of the effect runner, takes effect from the next frame."""
+        self.clock.set_fps(fps)
+        if self.effect_process:
+            self.effect_process.set_fps(fps)
+        Log.info("EffectsEngine", f"Effects running at {fps} FPS.")
 
     @EngineManager.requires_active
     def get_state(self):
         """Return the current state of the LED strip."""
-        if not self.current_effect and self.effects:
+        effect = self._selected_effect()
+        if not effect and self.effects:
             return {
                 "current_effect": list(self.effects.keys())[0],
                 "parameters": None
             }
         
-        if self.current_effect:
+        if effect:
             return {
-                "current_effect": self.get_effect_name(self.current_effect),
-                "parameters": {name: param.get() for name, param in self.current_effect.parameters.items()}
+                "current_effect": self.get_effect_name(effect),
+                "parameters": {name: param.get() for name, param in effect.parameters.items()}
             }
         
         return {
@@ -157,44 +453,159 @@ class EffectsEngine(Engine):
 
     @EngineManager.requires_active
     def set_effect(self, effect_name):
-        """Set the current LED effect."""
+        """Set the current LED effect. While running in thread mode, the effect is created in the calling thread,
+        so the runner keeps drawing the old one meanwhile, and faded in over the transition_duration from the config.
+        The effect is saved to the config only if it was created."""
         Log.info("EffectsEngine", f"Setting effect to {effect_name}")
-        if effect_name in self.effects:
-            self.current_effect = self.effects[effect_name](self.renderer, self.coords)
-            Config().config["current_effect"] = effect_name
-            Config().save()
-            for param in self.current_effect.parameters.values():
-                last_value = Config().config.get("parameters", {}).get(effect_name, {}).get(param.name, None)
-                if last_value is not None:
-                    param.set(last_value)
-            Log.info("EffectsEngine", f"Effect set to {effect_name}")
-            return {"status": "success", "current_effect": effect_name}
-        return {"status": "error", "message": "Effect not found"}
+        if effect_name not in self.effects:
+            return {"status": "error", "message": "Effect not found"}
+        try:
+            if self.running and self.execution_mode != "process":
+                with self.transition_lock:
+                    self._effect_request += 1
+                    request = self._effect_request
+                self._prepare_effect(effect_name, request)
+            else:
+                effect = self._create_effect(effect_name, self._effect_renderer())
+                self.current_effect = effect
+                if self.execution_mode == "process" and self.running:
+                    self._start_effect_process(effect_name)
+        except Exception as e:
+            Log.error_exc("EffectsEngine", e)
+            Log.warn("EffectsEngine", f"Couldn't switch to effect {effect_name}.")
+            return {"status": "error", "message": f"Couldn't start effect {effect_name}: {e}"}
+        Config().config["current_effect"] = effect_name
+        recent_effects = [name for name in Config().config.get("recent_effects", []) if name != effect_name]
+        Config().config["recent_effects"] = [effect_name] + recent_effects[:self.PREFETCH_COUNT]
+        Config().save()
+        Log.info("EffectsEngine", f"Effect set to {effect_name}")
+        return {"status": "success", "current_effect": effect_name}
+
+    def _load_layers(self):
+        """Create the layers saved in the config, called when enabled and when the setup changes."""
+        layers = []
+        if self.execution_mode != "process":
+            for layer_config in Config().config.get("layers", []):
+                try:
+                    layers.append(self._create_layer(**layer_config))
+                except (KeyError, ValueError, TypeError) as e:
+                    Log.warn("EffectsEngine", f"Skipping invalid layer {layer_config}: {e}")
+        self.layer_stack.layers = layers
+
+    def _create_layer(self, effect, blend_mode=BlendMode.NORMAL, opacity=1.0, mask=None) -> Layer:
+        """Create a layer running an effect. mask is a list of LED indices the layer is drawn on, None for all."""
+        if effect not in self.effects:
+            raise KeyError(f"Effect {effect} not found")
+        buffer = LayerBuffer(len(self.coords), self.renderer.debug_draw)
+        layer = Layer(buffer, blend_mode=blend_mode, opacity=opacity, mask=self._mask_from_indices(mask))
+        layer.effect = self._create_effect(effect, buffer)
+        # kept for saving the layer to the config
+        layer.effect_name = effect
+        layer.mask_indices = mask
+        return layer
+
+    def _mask_from_indices(self, indices) -> np.ndarray | None:
+        if indices is None:
+            return None
+        mask = np.zeros(len(self.coords), dtype=np.float32)
+        indices = np.asarray(indices, dtype=np.intp)
+        mask[indices[(indices >= 0) & (indices < len(mask))]] = 1
+        return mask
+
+    def _save_layers(self):
+        Config().config["layers"] = self._layer_configs()
+        Config().save()
+
+    def _layer_configs(self) -> list[dict]:
+        return [{
+            "effect": layer.effect_name,
+            "blend_mode": layer.blend_mode,
+            "opacity": layer.opacity,
+            "mask": layer.mask_indices,
+        } for layer in self.layer_stack.layers]
+
+    @EngineManager.requires_active
+    def get_layers(self):
+        """Return the layers drawn over the current effect, from the bottom."""
+        return self._layer_configs()
+
+    @EngineManager.requires_active
+    def add_layer(self, effect_name, blend_mode=BlendMode.NORMAL, opacity=1.0, mask=None):
+        """Add an effect layer on top of the others. mask is a list of LED indices, None for all of them."""
+        if self.execution_mode == "process":
+            return {"status": "error", "message": "Layers aren't supported when effects run in a process"}
+        try:
+            layer = self._create_layer(effect_name, blend_mode, opacity, mask)
+        except (KeyError, ValueError, TypeError) as e:
+            return {"status": "error", "message": str(e)}
+        # replace the list instead of appending, the runner may be iterating over it
+        self.layer_stack.layers = self.layer_stack.layers + [layer]
+        self._save_layers()
+        return {"status": "success", "layers": self._layer_configs()}
+
+    @EngineManager.requires_active
+    def set_layer(self, index, blend_mode=None, opacity=None, mask=None, clear_mask=False):
+        """Change the blending of a layer. Only the given values are changed, clear_mask draws it on all the LEDs again."""
+        layers = self.layer_stack.layers
+        if not isinstance(index, int) or not 0 <= index < len(layers):
+            return {"status": "error", "message": "Layer not found"}
+        layer = layers[index]
+        # check all the values before changing anything
+        if blend_mode is not None and blend_mode not in BlendMode.ALL:
+            return {"status": "error", "message": f"Unknown blend mode {blend_mode}"}
+        try:
+            if opacity is not None:
+                opacity = float(opacity)
+            if mask is not None or clear_mask:
+                mask_indices = None if clear_mask else list(mask)
+                mask = self._mask_from_indices(mask_indices)
+        except (TypeError, ValueError) as e:
+            return {"status": "error", "message": f"Invalid opacity or mask: {e}"}
+        if blend_mode is not None:
+            layer.blend_mode = blend_mode
+        if opacity is not None:
+            layer.opacity = opacity
+        if mask is not None or clear_mask:
+            layer.mask_indices = mask_indices
+            layer.mask = mask
+        self._save_layers()
+        return {"status": "success", "layers": self._layer_configs()}
+
+    @EngineManager.requires_active
+    def remove_layer(self, index):
+        """Remove a layer."""
+        layers = self.layer_stack.layers
+        if not 0 <= index < len(layers):
+            return {"status": "error", "message": "Layer not found"}
+        self.layer_stack.layers = layers[:index] + layers[index + 1:]
+        self._save_layers()
+        return {"status": "success", "layers": self._layer_configs()}
 
     @EngineManager.requires_active
     def get_parameters(self, effect_name):
         """Get parameters for a specific effect."""
         if effect_name in self.effects:
-            effect_class = self.effects[effect_name]
-            parameters = effect_class(self.renderer, self.coords).get_parameters()
-            return parameters
+            return self.get_metadata(effect_name)["parameters"]
         return {"error": "Effect not found"}
 
     @EngineManager.requires_active
     def set_parameter(self, param_name, value):
         """Set a specific parameter for the current effect."""
         Log.info("EffectsEngine", f"Setting parameter {param_name} to {value}")
-        if self.current_effect and param_name in self.current_effect.parameters:
+        effect = self._selected_effect()
+        if effect and param_name in effect.parameters:
             if "parameters" not in Config().config:
                 Config().config["parameters"] = {}
                 Config().save()
 
-            effect_name = self.get_effect_name(self.current_effect)
+            effect_name = self.get_effect_name(effect)
             if effect_name not in Config().config["parameters"]:
                 Config().config["parameters"][effect_name] = {}
                 Config().save()
 
-            self.current_effect.parameters[param_name].set(value)
+            effect.parameters[param_name].set(value)
+            if self.effect_process:
+                self.effect_process.set_parameter(param_name, value)
             Config().config["parameters"][effect_name][param_name] = value
             Config().save()
             return {"status": "success"}
@@ -207,15 +618,15 @@ class EffectsEngine(Engine):
         effect_names = []
         types = []
         display_names = []
-        for name, effect_class in self.effects.items():
-            effect_instance = effect_class(self.renderer, self.coords)
+        for name in self.effects:
+            metadata = self.manifest[self.effect_hashes[name]]
             # Check if the effect is compatible with the current setup
-            if (effect_instance.effect_type == EffectType.ONLY_2D and self.setup.type == SetupType.THREE_DIMENSIONAL) or \
-                (effect_instance.effect_type == EffectType.ONLY_3D and self.setup.type == SetupType.TWO_DIMENSIONAL):
+            if (metadata["effect_type"] == EffectType.ONLY_2D and self.setup.type == SetupType.THREE_DIMENSIONAL) or \
+                (metadata["effect_type"] == EffectType.ONLY_3D and self.setup.type == SetupType.TWO_DIMENSIONAL):
                 continue
-            types.append(EffectType.display_name(effect_instance.effect_type))
+            types.append(EffectType.display_name(metadata["effect_type"]))
             effect_names.append(name)
-            display_names.append(effect_instance.display_name)
+            display_names.append(metadata["display_name"])
         effect_data = list(zip(effect_names, types, display_names))
         sorting_key_2d = {
             EffectType.display_name(EffectType.ONLY_2D): 0,
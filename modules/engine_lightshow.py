@@ -2,15 +2,81 @@ from modules.engine import AudioEngine
 from modules.engine_manager import EngineManager
 from modules.log_manager import Log
 import json
+import hashlib
 import sys, os, importlib.util, inspect
+import multiprocessing
+import difflib
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
 from pathlib import Path
+import numpy as np
+import modules.caching as cache
 from modules.lightshow_effects import LightshowEffects
 from modules.config_manager import Config
+from modules.frame_store import FrameStore, effect_output_to_arrays
+from modules.metrics import Metrics
+
+def load_effect_registry(effects_dir: Path, coords) -> dict:
+    """Import all lightshow effect files and return a dict of "namespace:name" -> bound effect function."""
+    registry = {}
+    for path in effects_dir.glob("*.py"):
+        spec = importlib.util.spec_from_file_location(path.stem, str(path))
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        for _, cls in inspect.getmembers(mod, inspect.isclass):
+            if issubclass(cls, LightshowEffects) and cls is not LightshowEffects:
+                ns = getattr(cls, "__namespace__", "") or ""
+                inst = cls(coords)
+                for name, fn in inspect.getmembers(inst, inspect.ismethod):
+                    if hasattr(fn, "__is_effect__"):
+                        key = f"{ns + ':' if ns else ''}{name}"
+                        registry[key] = fn
+    return registry
+
+
+_worker_registry = {} # effect registry of a compile worker process
+
+def _init_compile_worker(effects_dir: str, coords, log_file):
+    global _worker_registry
+    Log._current_log_file = log_file
+    _worker_registry = load_effect_registry(Path(effects_dir), coords)
+
+def _compile_item(effect_name: str, params: dict, steps: int, led_count: int):
+    """Render one timeline item in a compile worker into a new shared memory block: (steps, N, 3) colors followed
+    by the (steps, N) alpha mask. Returns the name of the block, the number of rendered frames and whether it has alpha,
+    or None if nothing was rendered. The caller unlinks the block."""
+    colors, alpha = effect_output_to_arrays(_worker_registry[effect_name](steps, **params), led_count)
+    if len(colors) == 0:
+        return None
+    shm = shared_memory.SharedMemory(create=True, size=colors.nbytes + len(colors) * led_count)
+    _shared_item_arrays(shm, len(colors), led_count)[0][:] = colors
+    if alpha is not None:
+        _shared_item_arrays(shm, len(colors), led_count)[1][:] = alpha
+    shm.close()
+    return shm.name, len(colors), alpha is not None
+
+def _shared_item_arrays(shm, frame_count: int, led_count: int) -> tuple[np.ndarray, np.ndarray]:
+    colors = np.ndarray((frame_count, led_count, 3), dtype=np.uint8, buffer=shm.buf)
+    alpha = np.ndarray((frame_count, led_count), dtype=bool, buffer=shm.buf, offset=colors.nbytes)
+    return colors, alpha
+
 
 class LightshowEngine(AudioEngine):
     """
     A test engine implementation for testing purposes.
     """
+    EFFECT_DIR = "lightshow_effects"
+    CACHE_PATH = "lightshows" # compiled frames, one folder per lightshow
+    COMPILE_PROCESSES = os.cpu_count() or 1
+    # starting the worker processes takes a while, smaller shows are compiled faster in this process
+    PARALLEL_MIN_PIXELS = 2_000_000 # frames * LEDs
+    SEGMENT_PATH = "segments" # rendered timeline items, in the folder of the lightshow
+    # streaming mode ("lightshow_streaming" in the config): frames are rendered in the background ahead of the playhead
+    LOOKAHEAD_SECONDS = 10 # default of "lightshow_lookahead"
+    STREAM_READY_SECONDS = 3 # rendered before the lightshow is reported ready
+    STREAM_CHUNK_SECONDS = 1 # frames drawn at once, the playhead is checked between the chunks, so seeks are followed
+    STREAM_READY_TIMEOUT = 30 # report the lightshow ready anyway if the first seconds take longer, the rest are misses
 
     def __init__(self, renderer, active_setup, ready_callback):
         super().__init__(renderer, ready_callback)
@@ -18,17 +84,26 @@ class LightshowEngine(AudioEngine):
         self.active_setup = active_setup
         self.coords = active_setup.coords
         self.ready_callback = ready_callback
+        self.frame_ready = None # (F,) bool of the frames rendered so far when streaming, None if all of them are
+        self._stream_thread = None
+        self._stream_args = None # (frames, items, cache path, cache name) of the streamed lightshow
+        self._stream_stop = threading.Event()
+        self._stream_ready = threading.Event()
+        self._misses = Metrics().counter("lightshow_frame_misses_total")
 
     def load_lightshow(self, lightshow_file):
         """Load the lightshow JSON file and extract the audio file path."""
         # get the performance mode
-        performance_mode = Config().config.get("performance_mode", "normal")
-        if performance_mode == "low":
-            self.FPS = 20
-        elif performance_mode == "high":
-            self.FPS = 60
-        else:
-            self.FPS = 30
+        self.FPS = Config().target_fps()
+        self._stop_streaming()
+        self.frame_ready = None
+        self._stream_args = None
+        # a new lightshow starts from the beginning, even if the previous one was paused somewhere else
+        self._stop_flag = True
+        if self._runner_thread and self._runner_thread.is_alive() and threading.current_thread() != self._runner_thread:
+            self._runner_thread.join()
+        self.current_time = 0.0
+        self.seek_time_at_start = 0.0
         try:
             with open(lightshow_file, "r") as f:
                 data = json.load(f)
@@ -36,7 +111,9 @@ class LightshowEngine(AudioEngine):
                 audio_file = data.get("audio_file")
                 if not audio_file:
                     raise ValueError("No audio file specified in the lightshow JSON.")
-                self.frames = self.process_lightshow()
+                self.frames = self.load_compiled(lightshow_file)
+                if self._stream_thread is not None and not self._stream_ready.wait(self.STREAM_READY_TIMEOUT):
+                    Log.warn("LightshowEngine", f"The first {self.STREAM_READY_SECONDS}s of the lightshow aren't rendered yet, starting anyway.")
                 Log.info("LightshowEngine", f"Loaded lightshow: {lightshow_file}")
                 return audio_file
         except Exception as e:
@@ -46,7 +123,6 @@ class LightshowEngine(AudioEngine):
     @EngineManager.requires_active
     def on_audio_load(self, audio_file: str):
         """Load the lightshow data and prepare for playback."""
-        self._load_effects()
         lightshow_file = os.path.join("lightshows", f"{os.path.splitext(audio_file)[0]}.json")
         audio_file_path = self.load_lightshow(lightshow_file)
         if audio_file_path:
@@ -59,38 +135,157 @@ class LightshowEngine(AudioEngine):
 
     def on_enable(self):
         Log.info("LightshowEngine", "LightshowEngine enabled.")
+        if self._stream_args is not None and self._stream_thread is None and not self.frame_ready.all():
+            self._run_streaming() # continue where it stopped when the engine was disabled
 
     def on_disable(self):
         Log.info("LightshowEngine", "LightshowEngine disabled.")
+        self._stop_streaming() # don't take the CPU from the engine taking over
 
     def on_frame(self, current_time):
         # display the correct frame
         frame_index = int(current_time * self.FPS)
         if frame_index < len(self.frames):
-            frame = self.frames[frame_index]
-            # update the colors in the renderer
-            self.renderer.set_colors(frame)
+            if self.frame_ready is not None and not self.frame_ready[frame_index]:
+                # not rendered yet, keep showing the last frame
+                self._misses.inc()
+            else:
+                # update the colors in the renderer
+                self.renderer.set_frame(self.frames[frame_index])
         self.renderer.show()
 
+    def load_compiled(self, lightshow_file):
+        """Return the compiled frames of the loaded lightshow, memory-mapped from the cache if it was compiled before
+        with the same lightshow, effects, setup and FPS. Otherwise compile it, reusing what didn't change since the
+        previous compilation, and cache it."""
+        cache_path = os.path.join(self.CACHE_PATH, Path(lightshow_file).stem)
+        cache_name = self._cache_name()
+        timeline = self.lightshow_data.get("timeline", [])
+        self.audio_length = max(item.get("end", 0) for item in timeline) if timeline else 0
+        cached = cache.get_mapped_cache_by_name(cache_path, cache_name, ["frames", "alpha"])
+        if cached is not None:
+            Log.info("LightshowEngine", "Using the compiled lightshow from the cache.")
+            return FrameStore.from_arrays(cached["frames"], cached["alpha"])
+        if Config().config.get("lightshow_streaming", False):
+            return self._start_streaming(cache_path, cache_name)
+        frames = self.process_lightshow(os.path.join(cache_path, self.SEGMENT_PATH), self._load_previous(cache_path))
+        self._save_compiled(cache_path, cache_name, frames)
+        return frames
+
+    def _save_compiled(self, cache_path, cache_name, frames: FrameStore):
+        try:
+            cache.clear_cache(cache_path) # older compilations of this lightshow
+            cache.set_mapped_cache_by_name(cache_path, cache_name, {"frames": frames.frames, "alpha": frames.alpha})
+            cache.set_cache_by_name(cache_path, "timeline", json.dumps({"name": cache_name, "items": self.compiled_items}))
+        except OSError as e:
+            Log.warn("LightshowEngine", f"Couldn't cache the compiled lightshow: {e}")
+
+    def _start_streaming(self, cache_path, cache_name) -> FrameStore:
+        """Start rendering the lightshow in the background and return its frames, see _stream_lightshow."""
+        items = self._timeline_items()
+        frames = FrameStore(int(self.FPS * self.audio_length), len(self.coords))
+        self.compiled_items = [(key, start_frame, steps) for key, _, _, steps, start_frame in items]
+        self.frame_ready = np.ones(len(frames), dtype=bool)
+        for start, end in self._reuse_previous(frames, self._load_previous(cache_path)):
+            self.frame_ready[start:end] = False
+        self.registry = None
+        self._stream_args = (frames, items, cache_path, cache_name)
+        self._stream_ready.clear()
+        self._run_streaming()
+        return frames
+
+    def _run_streaming(self):
+        self._stream_stop.clear()
+        self._stream_thread = threading.Thread(target=self._stream_lightshow, args=self._stream_args, daemon=True)
+        self._stream_thread.start()
+
+    def _stop_streaming(self):
+        """Stop the streaming worker, the frames drawn so far stay ready."""
+        if self._stream_thread is not None:
+            self._stream_stop.set()
+            if threading.current_thread() != self._stream_thread:
+                self._stream_thread.join()
+            self._stream_thread = None
+
+    def _stream_lightshow(self, frames: FrameStore, items: list[tuple], cache_path, cache_name):
+        """
+        Background worker of the streaming mode.
+        Draws the first frames that aren't rendered yet in the lookahead window after the playhead, a chunk at a time,
+        rendering the items overlapping the chunk if they aren't cached. When the window is full, it draws the rest
+        of the lightshow, the playhead is checked again after every chunk.
+        Effects render whole items, so a long item overlapping a chunk is rendered over its full length first.
+        Sets _stream_ready once STREAM_READY_SECONDS from where the playhead was when the worker started are drawn.
+        When the whole lightshow is drawn, it's cached like a compiled one.
+        """
+        segment_path = os.path.join(cache_path, self.SEGMENT_PATH)
+        segments = {}
+        frame_ready = self.frame_ready
+        lookahead = max(int(Config().config.get("lightshow_lookahead", self.LOOKAHEAD_SECONDS) * self.FPS), 1)
+        chunk = max(int(self.STREAM_CHUNK_SECONDS * self.FPS), 1)
+        ready_start = min(int(self.current_time * self.FPS), len(frames))
+        ready_end = min(ready_start + int(self.STREAM_READY_SECONDS * self.FPS), len(frames))
+        try:
+            while not frame_ready.all():
+                if self._stream_stop.is_set():
+                    return
+                position = min(int(self.current_time * self.FPS), len(frames))
+                missing = np.flatnonzero(~frame_ready[position:position + lookahead])
+                if len(missing):
+                    start = position + int(missing[0])
+                else:
+                    # the window is full, draw the rest of the lightshow, after the window first, then the skipped
+                    # frames before the playhead, so the worker finishes and the lightshow gets cached
+                    missing = np.flatnonzero(~frame_ready[position:])
+                    start = position + int(missing[0]) if len(missing) else int(np.argmin(frame_ready))
+                end = min(start + chunk, len(frames))
+                drawn = np.flatnonzero(frame_ready[start:end])
+                if len(drawn):
+                    end = start + int(drawn[0])
+                needed = [item for item in items if item[0] not in segments and item[4] < end and item[4] + item[3] > start]
+                segments.update(self._load_segments(needed, segment_path))
+                self._draw_range(frames, segments, start, end)
+                frame_ready[start:end] = True
+                if not self._stream_ready.is_set() and frame_ready[ready_start:ready_end].all():
+                    self._stream_ready.set()
+            Log.info("LightshowEngine", "Streamed lightshow fully rendered.")
+            self._save_compiled(cache_path, cache_name, frames)
+            cache.clear_cache(segment_path, keep={key for key, *_ in items})
+        except Exception as e:
+            Log.error_exc("LightshowEngine", e)
+        finally:
+            self._stream_ready.set() # don't leave the loading waiting
+
+    def _load_previous(self, cache_path) -> tuple[FrameStore, list[tuple]] | None:
+        """The previous compilation of the lightshow and its items, see process_lightshow."""
+        data = cache.get_cache_by_name(cache_path, "timeline")
+        if not data:
+            return None
+        previous = json.loads(data)
+        cached = cache.get_mapped_cache_by_name(cache_path, previous["name"], ["frames", "alpha"])
+        if cached is None:
+            return None
+        return FrameStore.from_arrays(cached["frames"], cached["alpha"]), [tuple(item) for item in previous["items"]]
+
+    def _cache_name(self) -> str:
+        """Hash of everything the compiled frames depend on: the lightshow, the effect sources, the coordinates and the FPS."""
+        key = hashlib.sha1(json.dumps(self.lightshow_data, sort_keys=True).encode("utf-8"))
+        key.update(self._effects_hash().encode("utf-8"))
+        key.update(cache.hash_array(np.asarray(self.coords, dtype=np.float64)).encode("utf-8"))
+        key.update(f"fps:{self.FPS}".encode("utf-8"))
+        return key.hexdigest()
+
+    def _effects_hash(self) -> str:
+        """Hash of the sources of all lightshow effects, without importing them."""
+        key = hashlib.sha1()
+        for path in sorted(Path(self.EFFECT_DIR).glob("*.py")):
+            key.update(f"{path.name}:{cache.hash_file(path)}".encode("utf-8"))
+        return key.hexdigest()
+
     def _load_effects(self):
-        EFFECT_DIR = "lightshow_effects"
-        self.effects_dir = Path(EFFECT_DIR)
-        self.registry = {}
-        self._load_all()
- 
-    def _load_all(self):
-        for py in self.effects_dir.glob("*.py"):
-            self._import_file(py)
-    
-    def _import_file(self, path: Path):
-        spec = importlib.util.spec_from_file_location(path.stem, str(path))
-        mod = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        for _, cls in inspect.getmembers(mod, inspect.isclass):
-            if issubclass(cls, LightshowEffects) and cls is not LightshowEffects:
-                self._register_class(cls)
+        self.effects_dir = Path(self.EFFECT_DIR)
+        self.registry = load_effect_registry(self.effects_dir, self.coords)
 
-    def process_lightshow(self):
+    def process_lightshow(self, segment_path=None, previous=None):
         """
         Steps:
         (have effects loaded)
@@ -98,9 +293,32 @@ class LightshowEngine(AudioEngine):
         2. separate timeline into layer lists
         3. for each layer:
         - apply all filters to the layers beneath
-        - process all effects in the layer
-        4. fill None (transparent) with black at the end
+        - process all effects in the layer (in parallel processes for big shows), the rendered segment of each item
+          is cached in segment_path, keyed by the effect, parameters, steps, effect sources and coordinates
+        4. draw the segments over each other in the layer order, transparent pixels stay black
+
+        If the previous compilation (frames, items) is given, only the frames where the items changed are drawn again,
+        the rest is copied. The items of this compilation are stored in self.compiled_items.
+
+        Returns a FrameStore with the compiled frames.
         """
+        items = self._timeline_items()
+        frames = FrameStore(int(self.FPS * self.audio_length), len(self.coords)) # all transparent
+        self.registry = None
+        segments = self._load_segments(items, segment_path)
+        self.compiled_items = [(key, start_frame, steps) for key, _, _, steps, start_frame in items]
+        dirty = self._reuse_previous(frames, previous)
+        # draw all the items overlapping the changed frames again, in the layer order
+        for start, end in dirty:
+            self._draw_range(frames, segments, start, end)
+        Log.info("LightshowEngine", f"Drew {sum(end - start for start, end in dirty)} of {len(frames)} frames.")
+        if segment_path is not None:
+            cache.clear_cache(segment_path, keep={key for key, *_ in items}) # segments of removed or changed items
+        # return the processed frames
+        return frames
+
+    def _timeline_items(self) -> list[tuple]:
+        """Return (segment key, effect name, params, steps, start frame) of the timeline items in the order they are drawn."""
         # sort the timeline by layers
         layer_count = self.lightshow_data.get("editor_data", {}).get("layer_count", 1)
         layers = [[] for _ in range(layer_count)]
@@ -115,55 +333,163 @@ class LightshowEngine(AudioEngine):
         for layer in layers:
             layer.sort(key=lambda x: x.get("start", 0))
         # apply effects for now (TODO: add filters, not implemented yet)
-        frames = [[None] * len(self.coords) for _ in range(int(self.FPS * self.audio_length))] # frames filled with None (transparent)
+        items = []
+        setup_hash = self._effects_hash() + cache.hash_array(np.asarray(self.coords, dtype=np.float64))
         for layer in layers:
             for item in layer:
                 effect_name = item.get("effect")
                 if effect_name:
-                    if effect_name in self.registry:
-                        effect_func = self.registry[effect_name]
-                        params = item.get("parameters", {})
-                        # convert hex to RGB
-                        for key, value in params.items():
-                            if isinstance(value, str) and value.startswith("#"):
-                                params[key] = tuple(int(value[i:i+2], 16) for i in (1, 3, 5))  # convert hex to RGB tuple
-                        # calculate the number of steps
-                        start_time = item.get("start", 0)
-                        end_time = item.get("end", 0)
-                        if end_time <= start_time:
-                            Log.warn("LightshowEngine", f"Effect {effect_name} [{start_time}-{end_time}] has invalid end time, skipping.")
-                            continue
-                        duration = end_time - start_time
-                        steps = int(duration * self.FPS)
-                        # call the effect function
-                        Log.info("LightshowEngine", f"Processing effect {effect_name} with params {params}")
-                        effect_output = effect_func(steps, **params)
-                        # slice the frames to give the effect function the correct time range
-                        start_frame = int(start_time * self.FPS)
-                        # insert output directly into frames
-                        for i, frame in enumerate(effect_output):
-                            frame_index = start_frame + i
-                            if frame_index < len(frames):
-                                for led_index, color in enumerate(frame):
-                                    if led_index < len(frames[frame_index]) and color is not None:
-                                        frames[frame_index][led_index] = color
-                    else:
-                        Log.warn("LightshowEngine", f"Effect {effect_name} not found or not registered.")
+                    params = item.get("parameters", {})
+                    # convert hex to RGB
+                    for key, value in params.items():
+                        if isinstance(value, str) and value.startswith("#"):
+                            params[key] = tuple(int(value[i:i+2], 16) for i in (1, 3, 5))  # convert hex to RGB tuple
+                    # calculate the number of steps
+                    start_time = item.get("start", 0)
+                    end_time = item.get("end", 0)
+                    if end_time <= start_time:
+                        Log.warn("LightshowEngine", f"Effect {effect_name} [{start_time}-{end_time}] has invalid end time, skipping.")
+                        continue
+                    duration = end_time - start_time
+                    steps = int(duration * self.FPS)
+                    # slice the frames to give the effect function the correct time range
+                    start_frame = int(start_time * self.FPS)
+                    key = hashlib.sha1(f"{json.dumps([effect_name, params, steps], sort_keys=True)}{setup_hash}".encode("utf-8")).hexdigest()
+                    items.append((key, effect_name, params, steps, start_frame))
                 else:
                     Log.warn("LightshowEngine", "No effect key found in item, probably a filter, skipping for now.")
-        # fill None (transparent) with black at the end
-        for i in range(len(frames)):
-            frames[i] = [color if color is not None else (0, 0, 0) for color in frames[i]]
-        # return the processed frames
-        return frames
+        return items
+
+    def _reuse_previous(self, frames: FrameStore, previous) -> list[tuple[int, int]]:
+        """Copy the previous compilation into the frames if it fits and return the frame ranges which have to be drawn again."""
+        if previous is None or len(previous[0]) != len(frames) or previous[0].led_count != frames.led_count:
+            return [(0, len(frames))] if len(frames) else []
+        frames.frames[:] = previous[0].frames
+        frames.alpha[:] = previous[0].alpha
+        return self._dirty_ranges(previous[1], self.compiled_items, len(frames))
+
+    def _draw_range(self, frames: FrameStore, segments: dict, start: int, end: int):
+        """Draw the frames from start to end (exclusive) again from the segments of self.compiled_items."""
+        frames.clear(start, end)
+        for key, start_frame, frame_count in self.compiled_items:
+            first, last = max(start, start_frame), min(end, start_frame + frame_count)
+            if first < last:
+                colors, alpha = segments[key]
+                frames.merge(first, colors[first - start_frame:last - start_frame],
+                             alpha[first - start_frame:last - start_frame] if alpha is not None else None)
+
+    @staticmethod
+    def _dirty_ranges(previous_items: list[tuple], items: list[tuple], frame_count: int) -> list[tuple[int, int]]:
+        """Frame ranges (start, end) where the drawn items or their order changed, merged and sorted."""
+        ranges = []
+        matcher = difflib.SequenceMatcher(None, previous_items, items, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != "equal":
+                for _, start_frame, count in previous_items[i1:i2] + items[j1:j2]:
+                    ranges.append((max(start_frame, 0), min(start_frame + count, frame_count)))
+        merged = []
+        for start, end in sorted(ranges):
+            if start >= end:
+                continue
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
 
+    def _load_segments(self, items, segment_path) -> dict:
+        """Return segment key -> (colors, alpha) of all the items, rendering only the ones which aren't cached."""
+        segments = {}
+        missing = {}
+        for key, effect_name, params, steps, _ in items:
+            if key in segments or key in missing:
+                continue
+            cached = cache.get_mapped_cache_by_name(segment_path, key, ["colors"]) if segment_path else None
+            if cached is not None:
+                alpha = cache.get_mapped_cache_by_name(segment_path, key, ["alpha"]) # missing if fully opaque
+                segments[key] = (cached["colors"], alpha["alpha"] if alpha else None)
+            else:
+                missing[key] = (effect_name, params, steps)
+        if not missing:
+            return segments
+        Log.debug("LightshowEngine", f"Rendering {len(missing)} effects, {len(segments)} are cached.")
 
-    def _register_class(self, cls):
-        ns = getattr(cls, "__namespace__", "") or ""
-        inst = cls(self.coords)
-        for name, fn in inspect.getmembers(inst, inspect.ismethod):
-            if hasattr(fn, "__is_effect__"):
-                key = f"{ns + ':' if ns else ''}{name}"
-                self.registry[key] = fn
+        def store_segment(key, colors, alpha):
+            if segment_path is not None:
+                arrays = {"colors": colors} if alpha is None else {"alpha": alpha, "colors": colors} # colors last, they mark it complete
+                try:
+                    cache.set_mapped_cache_by_name(segment_path, key, arrays)
+                    cached = cache.get_mapped_cache_by_name(segment_path, key, list(arrays))
+                except OSError as e:
+                    Log.warn("LightshowEngine", f"Couldn't cache the rendered effect: {e}")
+                    cached = None
+                if cached is not None:
+                    segments[key] = (cached["colors"], cached.get("alpha"))
+                    return
+            # the arrays may be views of shared memory which is freed after this call
+            segments[key] = (np.array(colors), None if alpha is None else np.array(alpha))
 
+        if self.registry is None:
+            self._load_effects()
+        for key, (effect_name, _, _) in list(missing.items()):
+            if effect_name not in self.registry:
+                Log.warn("LightshowEngine", f"Effect {effect_name} not found or not registered.")
+                store_segment(key, np.zeros((0, len(self.coords), 3), dtype=np.uint8), None)
+                del missing[key]
 
+        pixels = sum(steps for _, _, steps in missing.values()) * len(self.coords)
+        if len(missing) > 1 and self.COMPILE_PROCESSES > 1 and pixels >= self.PARALLEL_MIN_PIXELS:
+            self._render_parallel(missing, store_segment)
+        else:
+            for key, (effect_name, params, steps) in missing.items():
+                Log.info("LightshowEngine", f"Processing effect {effect_name} with params {params}")
+                effect_output = self.registry[effect_name](steps, **params)
+                store_segment(key, *effect_output_to_arrays(effect_output, len(self.coords)))
+        return segments
+
+    def _render_parallel(self, items: dict, on_rendered):
+        """Render the items (key -> (effect name, params, steps)) in worker processes, on_rendered(key, colors, alpha)
+        is called with each result, the arrays are only valid during the call."""
+        led_count = len(self.coords)
+        Log.info("LightshowEngine", f"Processing {len(items)} effects in {min(self.COMPILE_PROCESSES, len(items))} processes.")
+        with ProcessPoolExecutor(
+            max_workers=min(self.COMPILE_PROCESSES, len(items)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_compile_worker,
+            initargs=(self.EFFECT_DIR, self.coords, Log._current_log_file),
+        ) as pool:
+            futures = {pool.submit(_compile_item, effect_name, params, steps, led_count): key
+                       for key, (effect_name, params, steps) in items.items()}
+            try:
+                for future in as_completed(futures):
+                    key = futures[future]
+                    result = future.result()
+                    Log.info("LightshowEngine", f"Processed effect {items[key][0]} with params {items[key][1]}")
+                    if result is None:
+                        on_rendered(key, np.zeros((0, led_count, 3), dtype=np.uint8), None)
+                    else:
+                        self._read_shared_item(on_rendered, key, led_count, *result)
+            finally:
+                # don't leave the blocks of unread items behind if an effect failed
+                pool.shutdown(cancel_futures=True)
+                for future in futures:
+                    if not future.cancelled() and future.exception() is None and future.result() is not None:
+                        self._unlink_shared_item(future.result()[0])
+
+    def _read_shared_item(self, on_rendered, key, led_count: int, shm_name: str, frame_count: int, has_alpha: bool):
+        shm = shared_memory.SharedMemory(name=shm_name)
+        try:
+            colors, alpha = _shared_item_arrays(shm, frame_count, led_count)
+            on_rendered(key, colors, alpha if has_alpha else None)
+            del colors, alpha
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def _unlink_shared_item(self, shm_name: str):
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name)
+        except FileNotFoundError:
+            return # already read
+        shm.close()
+        shm.unlink()
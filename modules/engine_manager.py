@@ -1,6 +1,8 @@
 from functools import wraps
 from modules.engine import Engine, AudioEngine
 from modules.setup import Setup, SetupType
+from modules.spatial_index import SpatialIndex
+from modules.geometry import SetupGeometry
 from modules.config_manager import Config
 from modules.log_manager import Log
 import json
@@ -98,6 +100,9 @@ class EngineManager:
             for coord in setup.coords:
                 if len(coord) == 2:
                     coord.append(0)
+        # the derived geometry belongs to the old setup
+        SpatialIndex.invalidate()
+        SetupGeometry.invalidate()
         for engine in self.engines:
             engine.on_setup_changed(setup)
         self.active_setup = setup
@@ -0,0 +1,91 @@
+from modules.engine import Engine
+from modules.engine_manager import EngineManager
+from modules.log_manager import Log
+from modules.frame_recording import FrameRecording, FILE_EXTENSION
+import os
+import threading
+import time
+
+class ReplayEngine(Engine):
+    """
+    Streams recorded frames (see RecorderSink) back to the renderer without computing anything.
+    Useful for showing heavy effects on weak hardware and as a reproducible input for performance tests.
+    """
+    RECORDINGS_PATH = "recordings"
+
+    def __init__(self, renderer, setup):
+        self.renderer = renderer
+        self.recording = None
+        self.loop = True
+        self.running = False
+        self.runner_thread = None
+        self.on_setup_changed(setup)
+
+    def on_enable(self):
+        Log.info("ReplayEngine", "ReplayEngine enabled.")
+
+    def on_disable(self):
+        self._stop()
+        Log.info("ReplayEngine", "ReplayEngine disabled.")
+
+    def on_setup_changed(self, setup):
+        self.led_count = len(setup.coords)
+
+    def list_recordings(self):
+        """
+        List the recording files in the recordings directory.
+        """
+        if not os.path.exists(self.RECORDINGS_PATH):
+            return []
+        return [f for f in os.listdir(self.RECORDINGS_PATH) if f.endswith(FILE_EXTENSION)]
+
+    @EngineManager.requires_active
+    def play(self, file_name: str, loop: bool = True):
+        """
+        Start replaying a recording from the recordings directory.
+        """
+        recording = FrameRecording(os.path.join(self.RECORDINGS_PATH, file_name))
+        if recording.led_count != self.led_count:
+            raise ValueError(f"Recording {file_name} has {recording.led_count} LEDs, but the current setup has {self.led_count}.")
+        if len(recording) == 0:
+            raise ValueError(f"Recording {file_name} doesn't contain any frames.")
+        self._stop()
+        self.recording = recording
+        self.loop = loop
+        self.running = True
+        self.runner_thread = threading.Thread(target=self._replay_runner, daemon=True)
+        self.runner_thread.start()
+        Log.info("ReplayEngine", f"Replaying {file_name} ({len(recording)} frames, {recording.duration:.1f}s)")
+
+    def stop(self):
+        """
+        Stop the replay. Doesn't activate the engine, there's nothing to stop if it isn't active.
+        """
+        self._stop()
+
+    def _stop(self):
+        self.running = False
+        if self.runner_thread and self.runner_thread.is_alive() and threading.current_thread() != self.runner_thread:
+            self.runner_thread.join()
+
+    def _replay_runner(self):
+        """
+        Shows every recorded frame at its recorded time.
+        """
+        times = self.recording.times
+        frames = self.recording.frames
+        while self.running:
+            start_time = time.monotonic()
+            for index in range(len(frames)):
+                if not self.running:
+                    return
+                delay = start_time + times[index] - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                self.renderer.set_frame(frames[index])
+                self.renderer.show()
+            if not self.loop:
+                break
+            # keep the gap between the last and the first frame similar to the others
+            time.sleep(self.recording.duration / max(1, len(frames) - 1))
+        self.running = False
@@ -7,6 +7,7 @@ import threading
 import time
 from modules.config_manager import Config
 from modules.setup import Setup
+from modules.frame_clock import FrameClock
 
 class SandboxEngine(Engine):
     """
@@ -17,8 +18,6 @@ class SandboxEngine(Engine):
     # default script to create if no scripts are present
     DEFAULT_SCRIPT =\
 """from modules.effect import LightEffect, ParamType, EffectType
-import modules.mathutils as mu
-import time
 
 class Breathing(LightEffect):
     def __init__(self, renderer, coords):
@@ -28,22 +27,26 @@ class Breathing(LightEffect):
         self.fade_speed = self.add_parameter("Fade Speed", ParamType.SLIDER, 50, min=1, max=500, step=1)
         self.color = self.add_parameter("Color", ParamType.COLOR, "#FF0000")
         self.off_time = 0.5 # Time to wait when the effect is fully faded out
+        self.off_timer = 0 # Remaining time of the off period
         self.t = 0 # The timer variable
         self.dir = 1 # Direction of the breathing effect (1 for fading in, -1 for fading out)
 
     def update(self):
-        # Update the time variable
-        self.t += self.dir * self.fade_speed.get() / 10000
+        # Wait while the effect is fully faded out
+        if self.off_timer > 0:
+            self.off_timer -= self.delta_time
+            return
+        # Update the time variable, delta_time is the time since the last frame (the speed is tuned for 60 FPS)
+        self.t += self.dir * self.fade_speed.get() / 10000 * self.delta_time * 60
         # Change direction if the breathing effect is fully faded in or out
         if self.t >= 1:
             self.dir = -1
         elif self.t <= 0:
             self.dir = 1
-            time.sleep(self.off_time)
-        # Update the leds and the renderer
-        for i in range(len(self.renderer)):
-            self.renderer[i] = [mu.clamp(int(channel * self.t), 0, 255) for channel in self.color.get()]
-        self.renderer.show()"""
+            self.off_timer = self.off_time
+        # Update the frame (a numpy array of every LED color) and show it on the lights
+        self.frame[:] = [channel * self.t for channel in self.color.get()]
+        self.show_frame()"""
 
     def __init__(self, renderer, active_setup: Setup):
         self.opened_file = None
@@ -53,6 +56,7 @@ class Breathing(LightEffect):
         self.effect_thread = None
         self.current_effect_instance = None
         self.running = False
+        self.clock = FrameClock(Config().target_fps(), "SandboxEngine")
         self.active_setup = active_setup
         if not os.path.exists(self.SANDBOX_PATH):
             os.makedirs(self.SANDBOX_PATH)
@@ -161,17 +165,23 @@ class Breathing(LightEffect):
         """
         Thread running the script
         """
+        self.clock.set_fps(Config().target_fps())
+        self.clock.reset()
         while self.running:
-            if self.current_effect_instance:
+            effect = self.current_effect_instance
+            if effect:
                 #Log.debug("SandboxEngine", "About to call update() on effect instance.")
                 try:
-                    self.current_effect_instance.update()
+                    effect.delta_time = self.clock.delta_time
+                    effect.update()
                 except Exception as e:
                     Log.error_exc("SandboxEngine", e)
                     self.current_effect_instance = None
+                self.clock.tick()
             else:
                 Log.debug("SandboxEngine", "No effect instance to run.")
                 time.sleep(0.1)
+                self.clock.reset()
 
     @EngineManager.requires_active
     def list_files(self):
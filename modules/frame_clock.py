@@ -0,0 +1,83 @@
+import time
+from modules.log_manager import Log
+
+class FrameClock:
+    """
+    Fixed timestep clock for frame loops.
+
+    Description:
+        Frame deadlines are spaced exactly 1/fps apart, tick() sleeps until the next one, so the loop
+        runs at a steady rate no matter how long the frame took to compute (as long as it fits).
+        A frame finishing after its deadline is an overrun, the clock then restarts from the current
+        time instead of rushing through the missed frames.
+
+    Attributes:
+        fps (float): Target frames per second.
+        delta_time (float): Seconds between the start of the previous frame and the current one.
+        frames (int): Number of finished frames.
+        overruns (int): Number of frames that missed their deadline.
+        overrun (bool): Whether the last finished frame missed its deadline.
+    """
+    MAX_DELTA_TIME = 0.25 # don't let effects jump too far after a long stall
+    OVERRUN_LOG_INTERVAL = 10 # seconds between overrun warnings
+
+    def __init__(self, fps: float, name: str = "FrameClock"):
+        self.name = name
+        self.set_fps(fps)
+        self.reset()
+
+    def set_fps(self, fps: float):
+        if fps <= 0:
+            raise ValueError(f"FPS must be positive, got {fps}.")
+        self.fps = fps
+        self.frame_length = 1 / fps
+
+    def reset(self):
+        """
+        Restart the clock, the current frame starts now.
+        """
+        self.frames = 0
+        self.overruns = 0
+        self.overrun = False
+        self.delta_time = self.frame_length
+        self._frame_start = time.perf_counter()
+        self._deadline = self._frame_start + self.frame_length
+        self._logged_overruns = 0
+        self._last_overrun_log = self._frame_start
+
+    def tick(self) -> float:
+        """
+        Finish the current frame: sleep until its deadline and start the next frame.
+        Returns the delta time of the new frame in seconds.
+        """
+        now = time.perf_counter()
+        self.overrun = now >= self._deadline
+        if not self.overrun:
+            # sleep() can wake up late, but never too early
+            time.sleep(self._deadline - now)
+            now = time.perf_counter()
+            self._deadline += self.frame_length
+        else:
+            self.overruns += 1
+            self._deadline = now + self.frame_length
+            self._log_overruns(now)
+        self.frames += 1
+        self.delta_time = min(now - self._frame_start, self.MAX_DELTA_TIME)
+        self._frame_start = now
+        return self.delta_time
+
+    def _log_overruns(self, now: float):
+        if now - self._last_overrun_log < self.OVERRUN_LOG_INTERVAL:
+            return
+        new_overruns = self.overruns - self._logged_overruns
+        Log.warn(self.name, f"{new_overruns} frames missed the {self.fps} FPS deadline in the last {now - self._last_overrun_log:.0f}s.")
+        self._logged_overruns = self.overruns
+        self._last_overrun_log = now
+
+    def get_stats(self) -> dict:
+        return {
+            "fps": self.fps,
+            "frames": self.frames,
+            "overruns": self.overruns,
+            "delta_time": self.delta_time,
+        }
@@ -0,0 +1,134 @@
+"""
+Binary protocol used to stream frames from the LEDRenderer to the LED simulator.
+
+Every message is a fixed size header followed by its payload:
+    magic (2 bytes, b"SF") | message type (uint8) | payload length (uint32, little endian) | payload
+"""
+import struct
+import json
+import numpy as np
+
+MAGIC = b"SF"
+HEADER = struct.Struct("<2sBI")
+
+MSG_FRAME = 1 # payload: raw RGB bytes, 3 bytes per LED
+MSG_DEBUG = 2 # payload: UTF-8 JSON list of debug elements, only sent when they change
+MSG_DELTA = 3 # payload: changed ranges, each one is a RANGE_HEADER followed by count * 3 RGB bytes
+
+RANGE_HEADER = struct.Struct("<II") # start index, LED count
+# unchanged LEDs between two changed ones are cheaper to resend than a new range header
+MERGE_GAP = RANGE_HEADER.size // 3
+
+
+class ProtocolError(Exception):
+    def __init__(self, message):
+        super().__init__(f"Invalid frame protocol data: {message}")
+
+
+def pack_message(msg_type: int, payload: bytes) -> bytes:
+    """
+    Prefix the payload with the message header.
+    """
+    return HEADER.pack(MAGIC, msg_type, len(payload)) + payload
+
+def pack_frame(frame: np.ndarray) -> bytes:
+    """
+    Pack a (N, 3) uint8 frame into a frame message.
+    """
+    return pack_message(MSG_FRAME, np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+
+def pack_debug(elements: list[dict]) -> bytes:
+    """
+    Pack a list of debug elements into a debug message.
+    """
+    return pack_message(MSG_DEBUG, json.dumps(elements).encode("utf-8"))
+
+def changed_ranges(previous: np.ndarray, frame: np.ndarray) -> list[tuple[int, int]]:
+    """
+    Find the ranges of LEDs that differ between two frames.
+    Returns a list of (start, end) index pairs, close ranges are merged together.
+    """
+    changed = np.flatnonzero(np.any(previous != frame, axis=1))
+    if changed.size == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(changed) > MERGE_GAP + 1)
+    starts = np.concatenate(([changed[0]], changed[breaks + 1]))
+    ends = np.concatenate((changed[breaks], [changed[-1]])) + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+def pack_delta(frame: np.ndarray, ranges: list[tuple[int, int]]) -> bytes:
+    """
+    Pack only the given (start, end) ranges of the frame into a delta message.
+    """
+    payload = bytearray()
+    for start, end in ranges:
+        payload += RANGE_HEADER.pack(start, end - start)
+        payload += frame[start:end].tobytes()
+    return pack_message(MSG_DELTA, bytes(payload))
+
+def apply_delta(colors: np.ndarray, payload: bytes):
+    """
+    Write the ranges of a delta message payload into the (N, 3) uint8 colors array in place.
+    """
+    offset = 0
+    while offset < len(payload):
+        start, count = RANGE_HEADER.unpack_from(payload, offset)
+        offset += RANGE_HEADER.size
+        if start + count > len(colors):
+            raise ProtocolError(f"delta range {start}-{start + count} is out of bounds for {len(colors)} LEDs")
+        colors[start:start + count] = np.frombuffer(payload, dtype=np.uint8, count=count * 3, offset=offset).reshape(-1, 3)
+        offset += count * 3
+
+def unpack_frame(payload: bytes) -> np.ndarray:
+    """
+    Convert a frame message payload back into a (N, 3) uint8 array.
+    """
+    if len(payload) % 3 != 0:
+        raise ProtocolError(f"frame payload of {len(payload)} bytes isn't made of RGB triplets")
+    return np.frombuffer(payload, dtype=np.uint8).reshape(-1, 3)
+
+def unpack_debug(payload: bytes) -> list[dict]:
+    """
+    Convert a debug message payload back into the list of debug elements.
+    """
+    return json.loads(payload.decode("utf-8"))
+
+
+class MessageReader:
+    """
+    Collects bytes received from a stream socket and splits them into complete messages.
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> list[tuple[int, bytes]]:
+        """
+        Add received data to the buffer.
+        Returns a list of (message type, payload) for every message completed by this data.
+        """
+        self._buffer += data
+        messages = []
+        offset = 0
+        while len(self._buffer) - offset >= HEADER.size:
+            magic, msg_type, length = HEADER.unpack_from(self._buffer, offset)
+            if magic != MAGIC:
+                raise ProtocolError(f"unexpected magic {magic!r}")
+            end = offset + HEADER.size + length
+            if len(self._buffer) < end:
+                break # incomplete message, wait for more data
+            messages.append((msg_type, bytes(self._buffer[offset + HEADER.size:end])))
+            offset = end
+        if offset:
+            del self._buffer[:offset]
+        return messages
+
+    def reset(self):
+        """
+        Skip the buffered data up to the next possible message start, used to recover after a ProtocolError.
+        """
+        start = self._buffer.find(MAGIC, 1)
+        if start == -1:
+            # keep a byte which could be the start of a magic split between two reads
+            del self._buffer[:max(len(self._buffer) - len(MAGIC) + 1, 0)]
+        else:
+            del self._buffer[:start]
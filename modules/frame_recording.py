@@ -0,0 +1,62 @@
+"""
+File format of recorded renderer frames.
+
+A recording is a fixed header followed by fixed size records, so it can be memory-mapped and
+replayed without decoding anything:
+    header: magic (4 bytes, b"SFRC") | version (uint32) | LED count (uint32) | reserved (uint32)
+    record: timestamp in seconds since the first frame (float64) | RGB bytes (LED count * 3)
+"""
+import os
+import struct
+import numpy as np
+
+MAGIC = b"SFRC"
+VERSION = 1
+HEADER = struct.Struct("<4sIII")
+FILE_EXTENSION = ".sfr"
+
+
+def record_dtype(led_count: int) -> np.dtype:
+    """
+    Numpy dtype of a single record for the given LED count.
+    """
+    return np.dtype([("time", "<f8"), ("rgb", "u1", (led_count, 3))])
+
+def pack_header(led_count: int) -> bytes:
+    return HEADER.pack(MAGIC, VERSION, led_count, 0)
+
+
+class FrameRecording:
+    """
+    Read-only, memory-mapped view of a recording. Frames are only loaded from the disk when accessed.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, led_count, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a frame recording (version {VERSION}).")
+        self.led_count = led_count
+        dtype = record_dtype(led_count)
+        # a recording interrupted mid-write can end with a partial record, ignore it
+        record_count = (os.path.getsize(path) - HEADER.size) // dtype.itemsize
+        if record_count > 0:
+            self._records = np.memmap(path, dtype=dtype, mode="r", offset=HEADER.size, shape=(record_count,))
+        else:
+            self._records = np.zeros(0, dtype=dtype)
+        self.times = self._records["time"]
+        self.frames = self._records["rgb"]
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def duration(self) -> float:
+        return float(self.times[-1]) if len(self) else 0.0
+
+    def frame_at(self, time: float) -> np.ndarray:
+        """
+        Return the frame shown at the given time of the recording.
+        """
+        index = max(0, int(np.searchsorted(self.times, time, side="right")) - 1)
+        return self.frames[index]
@@ -0,0 +1,135 @@
+import numpy as np
+
+class FrameStore:
+    """
+    Compiled frames of a lightshow.
+
+    Description:
+        All frames live in one preallocated (frames, N, 3) uint8 array, so a long show on a big setup
+        takes frames * N * 3 bytes instead of millions of Python tuples. alpha marks the LEDs some effect
+        has drawn, the rest is transparent and shows as black.
+
+    Attributes:
+        frames (np.ndarray): (F, N, 3) uint8 colors.
+        alpha (np.ndarray): (F, N) bool, True where an effect has drawn.
+    """
+    def __init__(self, frame_count: int, led_count: int):
+        self.led_count = led_count
+        self.frames = np.zeros((frame_count, led_count, 3), dtype=np.uint8)
+        self.alpha = np.zeros((frame_count, led_count), dtype=bool)
+
+    @classmethod
+    def from_arrays(cls, frames: np.ndarray, alpha: np.ndarray) -> "FrameStore":
+        """
+        Wrap existing arrays, e.g. memory-mapped ones from the cache, without copying them.
+        """
+        store = cls.__new__(cls)
+        store.led_count = frames.shape[1]
+        store.frames = frames
+        store.alpha = alpha
+        return store
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, index):
+        return self.frames[index]
+
+    def __repr__(self):
+        return f"FrameStore({len(self.frames)} frames, {self.led_count} LEDs, {(self.frames.nbytes + self.alpha.nbytes) / 1e6:.1f} MB)"
+
+    def clear(self, start: int, end: int):
+        """
+        Make the frames from start to end (exclusive) transparent again.
+        """
+        self.frames[start:end] = 0
+        self.alpha[start:end] = False
+
+    def merge(self, start_frame: int, colors: np.ndarray, alpha: np.ndarray | None = None):
+        """
+        Draw effect output over the frames from start_frame, the opaque pixels replace what's below them.
+        :param colors: (steps, N, 3) uint8 colors.
+        :param alpha: (steps, N) bool, True for the opaque pixels, None if all of them are.
+        """
+        start = max(start_frame, 0)
+        end = min(start_frame + len(colors), len(self.frames))
+        if end <= start:
+            return
+        colors = colors[start - start_frame:end - start_frame]
+        if alpha is None:
+            self.frames[start:end] = colors
+            self.alpha[start:end] = True
+        else:
+            alpha = alpha[start - start_frame:end - start_frame]
+            np.copyto(self.frames[start:end], colors, where=alpha[..., None])
+            self.alpha[start:end] |= alpha
+
+
+def effect_output_to_arrays(output, led_count: int) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    Convert the output of a lightshow effect to the colors and alpha arrays taken by FrameStore.merge.
+
+    Effects can return a list of frames of RGB tuples or None (transparent), a (steps, N, 3) array of
+    fully opaque frames, or a (colors, alpha) tuple of arrays. Colors are clipped to 0-255, frames with
+    a different number of LEDs are cut or padded with transparent pixels.
+    """
+    if isinstance(output, tuple):
+        colors, alpha = output
+        return _fit_arrays(_clip_colors(colors), np.asarray(alpha, dtype=bool), led_count)
+    if isinstance(output, np.ndarray):
+        return _fit_arrays(_clip_colors(output), None, led_count)
+    colors = np.zeros((len(output), led_count, 3), dtype=np.uint8)
+    alpha = np.zeros((len(output), led_count), dtype=bool)
+    all_opaque = True
+    previous_frame = None
+    for i, frame in enumerate(output):
+        if frame is previous_frame:
+            # effects often repeat the same frame, e.g. for a static part
+            colors[i] = colors[i - 1]
+            alpha[i] = alpha[i - 1]
+            continue
+        previous_frame = frame
+        frame = frame[:led_count]
+        if len(frame) < led_count:
+            all_opaque = False
+        if len(frame) and not isinstance(frame, np.ndarray) and frame.count(frame[0]) == len(frame):
+            # a single color (or fully transparent), no need to convert every pixel
+            if frame[0] is None:
+                all_opaque = False
+            else:
+                colors[i, :len(frame)] = _clip_colors(frame[0])
+                alpha[i, :len(frame)] = True
+            continue
+        if None in frame:
+            all_opaque = False
+            opaque = np.fromiter((color is not None for color in frame), dtype=bool, count=len(frame))
+            frame = [color if color is not None else (0, 0, 0) for color in frame]
+        else:
+            opaque = True
+        if len(frame):
+            colors[i, :len(frame)] = _clip_colors(frame)
+        alpha[i, :len(frame)] = opaque
+    return colors, None if all_opaque else alpha
+
+
+def _fit_arrays(colors: np.ndarray, alpha: np.ndarray | None, led_count: int) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    Cut the arrays to led_count LEDs, or pad them with transparent pixels.
+    """
+    frame_count, output_leds = colors.shape[:2]
+    if output_leds == led_count:
+        return colors, alpha
+    if output_leds > led_count:
+        return colors[:, :led_count], None if alpha is None else alpha[:, :led_count]
+    padded_colors = np.zeros((frame_count, led_count, 3), dtype=np.uint8)
+    padded_colors[:, :output_leds] = colors
+    padded_alpha = np.zeros((frame_count, led_count), dtype=bool)
+    padded_alpha[:, :output_leds] = True if alpha is None else alpha
+    return padded_colors, padded_alpha
+
+
+def _clip_colors(colors) -> np.ndarray:
+    colors = np.asarray(colors)
+    if colors.dtype == np.uint8:
+        return colors
+    return np.clip(colors, 0, 255).astype(np.uint8)
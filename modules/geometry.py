@@ -0,0 +1,97 @@
+import numpy as np
+import modules.mathutils as mu
+import modules.caching as cache
+from modules.log_manager import Log
+
+class SetupGeometry:
+    """
+    Per-LED values derived from the coordinates, which never change for a setup and are shared by all effects and engines.
+
+    Description:
+        Everything is computed once per setup and persisted to the .cache folder, so even big setups
+        are only processed the first time they are used. Use SetupGeometry.for_coords(coords), or the
+        geometry property of Setup and LightEffect. The cache is invalidated by EngineManager.change_setup.
+
+    Attributes:
+        positions (np.ndarray): (N, 3) coordinates.
+        normalized (np.ndarray): (N, 3) coordinates scaled to 0-1 in each axis (0 for flat axes).
+        centroid (np.ndarray): (3,) average position of the LEDs.
+        polar_radius (np.ndarray): (N,) XY distance of each LED from the centroid.
+        polar_angle (np.ndarray): (N,) XY angle of each LED around the centroid in radians (-pi to pi).
+        hull (np.ndarray): (H, 2) counter-clockwise convex hull vertices of the XY coordinates.
+        hull_normals (np.ndarray): (H, 2) outward unit normals of the hull edges, edge i goes from hull[i] to hull[i + 1].
+        hull_distances (np.ndarray): (N,) XY distance of each LED to the closest hull edge.
+    """
+    VERSION = 1 # increase when the computed fields change, so old cache files aren't used
+    CACHE_PATH = "geometry"
+    FIELDS = ["positions", "normalized", "centroid", "polar_radius", "polar_angle", "hull", "hull_normals", "hull_distances"]
+    _cache = {} # id(coords) -> SetupGeometry
+
+    def __init__(self, coords: list[list[float]]):
+        self.coords = coords
+        positions = np.zeros((len(coords), 3), dtype=np.float64)
+        positions[:, :len(coords[0])] = coords
+        cache_name = f"v{self.VERSION}_{cache.hash_array(positions)}"
+        cached = cache.get_array_cache_by_name(self.CACHE_PATH, cache_name)
+        if cached is not None and all(field in cached for field in self.FIELDS):
+            fields = cached
+        else:
+            Log.debug("SetupGeometry", f"Computing geometry of {len(coords)} LEDs.")
+            fields = self._compute(positions)
+            cache.set_array_cache_by_name(self.CACHE_PATH, cache_name, fields)
+        for field in self.FIELDS:
+            setattr(self, field, fields[field])
+
+    @classmethod
+    def for_coords(cls, coords: list[list[float]]) -> "SetupGeometry":
+        """
+        Return the geometry of the coordinate list, loading or computing it only the first time it's requested.
+        """
+        geometry = cls._cache.get(id(coords))
+        # the id can be reused by a new list once the old one is gone, check it's really the same list
+        if geometry is None or geometry.coords is not coords:
+            geometry = cls(coords)
+            cls._cache = {id(coords): geometry} # only the active setup is kept in memory
+        return geometry
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Drop the in-memory geometry, called when the setup changes.
+        """
+        cls._cache = {}
+
+    @staticmethod
+    def _compute(positions: np.ndarray) -> dict[str, np.ndarray]:
+        mins = positions.min(axis=0)
+        extents = positions.max(axis=0) - mins
+        normalized = np.divide(positions - mins, extents, out=np.zeros_like(positions), where=extents > 0)
+        centroid = positions.mean(axis=0)
+        offsets = positions[:, :2] - centroid[:2]
+        hull = np.array(mu.convex_hull(positions[:, :2].tolist()), dtype=np.float64).reshape(-1, 2)
+        edges = np.roll(hull, -1, axis=0) - hull
+        normals = np.stack((edges[:, 1], -edges[:, 0]), axis=1)
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+        return {
+            "positions": positions,
+            "normalized": normalized,
+            "centroid": centroid,
+            "polar_radius": np.linalg.norm(offsets, axis=1),
+            "polar_angle": np.arctan2(offsets[:, 1], offsets[:, 0]),
+            "hull": hull,
+            "hull_normals": normals,
+            "hull_distances": mu.distances_to_edges(positions, hull) if len(hull) else np.zeros(len(positions)),
+        }
+
+    def closest_hull_normal(self, point) -> np.ndarray:
+        """
+        Return the outward normal of the hull edge closest to the XY point, the vectorized mu.find_closest_edge.
+        """
+        point = np.asarray(point[:2], dtype=np.float64)
+        edges = np.roll(self.hull, -1, axis=0) - self.hull
+        offsets = point - self.hull
+        length_sq = np.einsum("ij,ij->i", edges, edges)
+        t = np.clip(np.einsum("ij,ij->i", offsets, edges) / np.where(length_sq == 0, 1, length_sq), 0, 1)
+        distances = np.linalg.norm(offsets - t[:, None] * edges, axis=1)
+        return self.hull_normals[np.argmin(distances)]
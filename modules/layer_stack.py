@@ -0,0 +1,159 @@
+import time
+import numpy as np
+from modules.led_renderer import FrameBuffer
+
+class BlendMode:
+    """How a layer is combined with the layers below it, the result is then faded in by the layer's opacity and mask."""
+    NORMAL = "normal" # the layer covers the layers below
+    ADD = "add" # colors are added together, brightens
+    SCREEN = "screen" # 1 - (1 - A) * (1 - B), brightens without clipping as hard as add, like mu.mix_colors
+    MULTIPLY = "multiply" # colors are multiplied, darkens
+
+    ALL = [NORMAL, ADD, SCREEN, MULTIPLY]
+
+
+class LayerBuffer(FrameBuffer):
+    """
+    Renderer of a single layer. show() doesn't output anything, the frame is picked up by the LayerStack.
+    Debug drawing goes straight to the real renderer.
+    """
+    def __init__(self, led_count: int, debug_draw):
+        super().__init__(led_count)
+        self.debug_draw = debug_draw
+
+    def show(self):
+        pass
+
+
+class Layer:
+    """
+    An effect drawn on top of the layers below it.
+
+    Attributes:
+        effect: The LightEffect drawing this layer, it has to be created with the layer's buffer as the renderer.
+        buffer (LayerBuffer): The frame of the layer.
+        blend_mode (str): One of BlendMode.
+        opacity (float): 0-1, multiplied with the mask.
+        mask (np.ndarray | None): (N,) weights 0-1 of the LEDs the layer is drawn on, None for all of them.
+    """
+    def __init__(self, buffer: LayerBuffer, effect=None, blend_mode: str = BlendMode.NORMAL, opacity: float = 1.0, mask=None):
+        if blend_mode not in BlendMode.ALL:
+            raise ValueError(f"Unknown blend mode {blend_mode}, expected one of {BlendMode.ALL}.")
+        self.buffer = buffer
+        self.effect = effect
+        self.blend_mode = blend_mode
+        self._opacity = 1.0
+        self._mask = None
+        self.opacity = opacity
+        self.mask = mask
+
+    @property
+    def opacity(self) -> float:
+        return self._opacity
+
+    @opacity.setter
+    def opacity(self, opacity: float):
+        self._opacity = min(max(float(opacity), 0.0), 1.0)
+        self._update_alpha()
+
+    @property
+    def mask(self) -> np.ndarray | None:
+        return self._mask
+
+    @mask.setter
+    def mask(self, mask):
+        if mask is not None:
+            mask = np.clip(np.asarray(mask, dtype=np.float32), 0, 1)
+            if mask.shape != (self.buffer.led_count,):
+                raise ValueError(f"Expected mask of shape ({self.buffer.led_count},), got {mask.shape}")
+        self._mask = mask
+        self._update_alpha()
+
+    def _update_alpha(self):
+        # precomputed, so compositing doesn't have to combine the opacity and the mask every frame
+        if self._mask is None:
+            self.alpha = np.float32(self._opacity)
+        else:
+            self.alpha = (self._mask * self._opacity)[:, None]
+
+
+class LayerStack:
+    """
+    Combines the frames of several effects into one.
+
+    Description:
+        The bottom frame is passed to composite(), the layers are blended on top of it in order.
+        All the math is done on preallocated float32 arrays, so compositing a few layers of thousands
+        of LEDs takes well under a millisecond.
+    """
+    def __init__(self, led_count: int):
+        self.led_count = led_count
+        self.layers: list[Layer] = []
+        self._result = np.zeros((led_count, 3), dtype=np.float32)
+        self._top = np.zeros((led_count, 3), dtype=np.float32)
+        self._blended = np.zeros((led_count, 3), dtype=np.float32)
+        self._frame = np.zeros((led_count, 3), dtype=np.uint8)
+
+    def composite(self, base: np.ndarray) -> np.ndarray:
+        """
+        Blend the layers over the (N, 3) uint8 base frame.
+        Returns an (N, 3) uint8 frame, which is reused by the next call.
+        """
+        layers = self.layers # the list may be replaced while compositing
+        if not layers:
+            return base
+        result, top, blended = self._result, self._top, self._blended
+        np.multiply(base, 1 / 255, out=result)
+        for layer in layers:
+            np.multiply(layer.buffer.leds, 1 / 255, out=top)
+            self._blend(layer.blend_mode, result, top, blended)
+            # result += (blended - result) * alpha
+            np.subtract(blended, result, out=blended)
+            np.multiply(blended, layer.alpha, out=blended)
+            np.add(result, blended, out=result)
+        np.multiply(result, 255, out=result)
+        np.copyto(self._frame, result, casting="unsafe") # truncated like mu.mix_colors
+        return self._frame
+
+    @staticmethod
+    def _blend(blend_mode: str, bottom: np.ndarray, top: np.ndarray, out: np.ndarray):
+        if blend_mode == BlendMode.NORMAL:
+            np.copyto(out, top)
+        elif blend_mode == BlendMode.ADD:
+            np.add(bottom, top, out=out)
+            np.minimum(out, 1, out=out)
+        elif blend_mode == BlendMode.SCREEN:
+            # 1 - (1 - A) * (1 - B) = A + B - A * B
+            np.multiply(bottom, top, out=out)
+            np.subtract(top, out, out=out)
+            np.add(bottom, out, out=out)
+        elif blend_mode == BlendMode.MULTIPLY:
+            np.multiply(bottom, top, out=out)
+
+
+class Crossfade:
+    """
+    Fades from the frame passed to blend() to the frame of the buffer over the duration, starting when created.
+    """
+    def __init__(self, buffer: LayerBuffer, duration: float):
+        self.buffer = buffer
+        self.duration = duration
+        self.start = time.perf_counter()
+        self._layer = Layer(buffer, opacity=0.0)
+        self._stack = LayerStack(buffer.led_count)
+        self._stack.layers = [self._layer]
+
+    @property
+    def progress(self) -> float:
+        """0-1, how far the fade is."""
+        if self.duration <= 0:
+            return 1.0
+        return min((time.perf_counter() - self.start) / self.duration, 1.0)
+
+    @property
+    def finished(self) -> bool:
+        return self.progress >= 1.0
+
+    def blend(self, frame: np.ndarray) -> np.ndarray:
+        self._layer.opacity = self.progress
+        return self._stack.composite(frame)
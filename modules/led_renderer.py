@@ -1,71 +1,40 @@
-import os
-import socket
-import json
 import threading
+import time
 from modules.setup import Setup
 from modules.log_manager import Log
 from modules.config_manager import Config
+from modules.metrics import Metrics
+from modules.output_sinks import OutputSink, SinkWorker, FakeHardwareSink, create_sink, default_sink_configs
 import copy
+import numpy as np
 
-class LEDRenderer:
-    def __init__(self, setup: Setup):
-        led_count = len(setup.coords)
+class FrameBuffer:
+    """
+    Base class of the renderers, holding the LED colors in a contiguous (N, 3) uint8 numpy array.
+    Provides the pixel-like access effects are written against, plus a fast path for writing whole frames.
+    """
+    def __init__(self, led_count: int):
         self.led_count = led_count
-        self.leds = [(0, 0, 0)] * led_count
-        self.debug_draw = self.DebugDraw()
-        self.brightness = Config().config.get("brightness", 1.0)
-        Log.info("LEDRenderer", f"Initializing LEDRenderer with {led_count} LEDs.")
-
-        # Setup a led simulator server if running on Windows
-        if os.name == 'nt':
-            self._clients = []
-            self._server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self._server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            HOST = "127.0.0.1"
-            PORT = 4897
-            try:
-                self._server_socket.bind((HOST, PORT))
-                self._server_socket.listen()
-                Log.info("LEDRenderer", f"Server listening on {HOST}:{PORT}")
-                
-                accept_thread = threading.Thread(target=self._accept_connections)
-                accept_thread.daemon = True
-                accept_thread.start()
-            except Exception as e:
-                Log.error("LEDRenderer", f"Failed to start server on {HOST}:{PORT}. {e}")
-                self._server_socket = None
-        else:
-            from neopixel import NeoPixel
-            import board
-            # LED Configuration
-            PIN = board.D18
-            self._pixels = NeoPixel(PIN, self.led_count, auto_write=False)
-
-    def _accept_connections(self):
-        while True:
-            try:
-                client_socket, addr = self._server_socket.accept()
-                Log.info("LEDRenderer", f"New connection from {addr}")
-                self._clients.append(client_socket)
-            except Exception as e:
-                Log.error("LEDRenderer", f"Error accepting connections: {e}")
-                break
+        self.leds = np.zeros((led_count, 3), dtype=np.uint8)
 
     # add dictionary-like access to the self.leds for the code i already wrote with pixels in mind
     def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return tuple(self.leds[index].tolist())
         return self.leds[index]
-    
+
     def __setitem__(self, index, value):
-        if isinstance(value, tuple) and len(value) == 3:
-            self.leds[index] = value
-        elif isinstance(value, list) and len(value) == 3:
-            self.leds[index] = tuple(value)
-        else:
+        if not isinstance(value, (tuple, list, np.ndarray)) or len(value) != 3:
             raise ValueError("Value must be a tuple of (R, G, B)")
-        
+        try:
+            self.leds[index] = value
+        except OverflowError:
+            # out of range ints, clip them instead of wrapping around
+            self.leds[index] = np.clip(value, 0, 255)
+
     def __len__(self):
         return self.led_count
-    
+
     def set_colors(self, colors: list[tuple[int, int, int]]):
         """
         Set the colors of the LEDs.
@@ -73,56 +42,239 @@ class LEDRenderer:
         """
         if len(colors) != self.led_count:
             raise ValueError(f"Expected {self.led_count} colors, got {len(colors)}")
-        self.leds = colors
-        Log.debug("LEDRenderer", f"Set colors: {colors}")
-    
+        self.set_frame(np.asarray(colors))
+
+    def set_frame(self, frame: np.ndarray):
+        """
+        Write a whole frame at once, the fast alternative to setting the pixels one by one.
+        :param frame: Array of shape (N, 3). uint8 arrays are copied directly, other types are clipped to 0-255.
+        """
+        if frame.shape != self.leds.shape:
+            raise ValueError(f"Expected frame of shape {self.leds.shape}, got {frame.shape}")
+        if frame.dtype == np.uint8:
+            np.copyto(self.leds, frame)
+        else:
+            np.copyto(self.leds, np.clip(frame, 0, 255), casting="unsafe")
+
+    def fill(self, color: tuple[int, int, int]):
+        self.leds[:] = color
+
+    def clear(self):
+        self.fill((0, 0, 0))
+
+
+class LEDRenderer(FrameBuffer):
+    def __init__(self, setup: Setup):
+        led_count = len(setup.coords)
+        super().__init__(led_count)
+        # preallocated buffer for the frame with color correction applied
+        self._output = np.zeros((led_count, 3), dtype=np.uint8)
+        self.debug_draw = self.DebugDraw()
+        self.brightness = Config().config.get("brightness", 1.0)
+        self.gamma = Config().config.get("gamma", 1.0)
+        self.white_balance = Config().config.get("white_balance", [1.0, 1.0, 1.0])
+        # offsets of the R, G and B tables in the flattened lookup table
+        self._lut_offsets = np.array([0, 256, 512], dtype=np.uint16)
+        self._build_lut()
+        Log.info("LEDRenderer", f"Initializing LEDRenderer with {led_count} LEDs.")
+
+        # show() hands finished frames to the output thread through a double buffer, the newest frame wins
+        self.refresh_rate = Config().config.get("refresh_rate", 60)
+        self._buffers = [np.zeros((led_count, 3), dtype=np.uint8), np.zeros((led_count, 3), dtype=np.uint8)]
+        self._back_buffer = 0 # index of the buffer show() writes into
+        self._pending_debug_elements = []
+        self._frame_pending = False
+        self._frame_condition = threading.Condition()
+        self.frames_dropped = 0 # frames replaced by a newer one before the output thread got to them
+        self._debug_sent = False # whether the outputs are currently showing debug elements
+
+        # frames identical to the last written one are skipped, apart from a refresh every idle_refresh_interval seconds
+        self.idle_refresh_interval = Config().config.get("idle_refresh_interval", 1.0)
+        self._last_written = np.zeros((led_count, 3), dtype=np.uint8)
+        self._last_write_time = 0.0
+        self._output_dirty = True # set when the color correction changes, so the same frame is written again
+        self.frames_written = 0
+        self.frames_skipped = 0
+
+        # timings and counters exported by /api/metrics
+        self._show_time = Metrics().histogram("renderer_show_seconds")
+        self._correction_time = Metrics().histogram("renderer_color_correction_seconds")
+        self._output_time = Metrics().histogram("renderer_output_seconds")
+        self._written_counter = Metrics().counter("renderer_frames_written_total")
+        self._skipped_counter = Metrics().counter("renderer_frames_skipped_total")
+        self._dropped_counter = Metrics().counter("renderer_frames_dropped_total")
+
+        # every written frame fans out to all output sinks, each one running on its own thread
+        self._sinks: list[SinkWorker] = []
+        for sink_config in Config().config.get("output_sinks", default_sink_configs()):
+            try:
+                self.add_sink(create_sink(led_count, sink_config))
+            except ImportError as e:
+                # no LED hardware libraries on this machine, keep the pipeline running without real LEDs
+                Log.warn("LEDRenderer", f"Output sink {sink_config} is not available ({e}), using a fake hardware sink instead.")
+                self.add_sink(FakeHardwareSink(led_count))
+            except Exception as e:
+                Log.error("LEDRenderer", f"Failed to create output sink {sink_config}. {e}")
+
+        self._output_thread = threading.Thread(target=self._output_loop, daemon=True)
+        self._output_thread.start()
+
+    def add_sink(self, sink: OutputSink):
+        """
+        Start sending the written frames to another output sink.
+        """
+        self._sinks.append(SinkWorker(sink))
+        self._output_dirty = True # give the new sink the current frame right away
+        Log.info("LEDRenderer", f"Added output sink '{sink.name}'.")
+
+    def remove_sink(self, sink: OutputSink):
+        """
+        Stop sending frames to the output sink and close it.
+        """
+        for worker in self._sinks:
+            if worker.sink is sink:
+                self._sinks.remove(worker)
+                worker.stop()
+                Log.info("LEDRenderer", f"Removed output sink '{sink.name}'.")
+                return
+
+    def _build_lut(self):
+        """
+        Bake brightness, gamma and white balance into a 256-entry lookup table per channel.
+        Only called when one of them changes, show() then corrects the whole frame with a single lookup.
+        """
+        levels = np.arange(256, dtype=np.float64) / 255
+        corrected = levels ** self.gamma * self.brightness
+        lut = np.outer(np.asarray(self.white_balance, dtype=np.float64), corrected) * 255
+        self._lut = np.clip(lut, 0, 255).astype(np.uint8).ravel()
+        self._output_dirty = True
+
     def set_brightness(self, brightness: float):
         """
         Set the brightness of the LEDs.
         Brightness should be a float between 0 and 1.
         """
         self.brightness = max(0, min(brightness, 1))
+        self._build_lut()
         Config().config["brightness"] = self.brightness
         Config().save()
         Log.info("LEDRenderer", f"Brightness set to {self.brightness * 100}%")
 
+    def set_color_correction(self, gamma: float | None = None, white_balance: list[float] | None = None):
+        """
+        Set the output color correction.
+        :param gamma: Gamma exponent applied to every channel (1.0 = no correction).
+        :param white_balance: Multipliers for the R, G and B channels, between 0 and 1.
+        """
+        if gamma is not None:
+            if gamma <= 0:
+                raise ValueError("Gamma must be a positive number.")
+            self.gamma = float(gamma)
+            Config().config["gamma"] = self.gamma
+        if white_balance is not None:
+            if len(white_balance) != 3:
+                raise ValueError("White balance must be a list of 3 channel multipliers (R, G, B).")
+            self.white_balance = [max(0, min(float(c), 1)) for c in white_balance]
+            Config().config["white_balance"] = self.white_balance
+        self._build_lut()
+        Config().save()
+        Log.info("LEDRenderer", f"Color correction set to gamma {self.gamma}, white balance {self.white_balance}")
 
-    def fill(self, color: tuple[int, int, int]):
-        for i in range(self.led_count):
-            self.leds[i] = color
 
-    def clear(self):
-        self.fill((0, 0, 0))
+    def set_refresh_rate(self, refresh_rate: float):
+        """
+        Set the maximum rate (frames per second) the output thread writes frames at.
+        """
+        if refresh_rate <= 0:
+            raise ValueError("Refresh rate must be a positive number.")
+        self.refresh_rate = refresh_rate
+        Config().config["refresh_rate"] = refresh_rate
+        Config().save()
+        Log.info("LEDRenderer", f"Refresh rate set to {refresh_rate} FPS")
 
     def show(self):
-        # led list to apply all filters, like brightness
-        absolute_leds = self.leds.copy()
-        # Apply brightness
-        for i in range(self.led_count):
-            absolute_leds[i] = tuple(int(c * self.brightness) for c in absolute_leds[i])
-        if os.name == 'nt':
-            if self._clients:
-            # Send the current LED colors to all connected clients
-                data = {
-                    "leds": absolute_leds,
-                    "debug_elements": self.debug_draw._get_elements()
-                }
-                message = json.dumps(data).encode('utf-8')
-                disconnected_clients = []
-                for client in self._clients:
-                    try:
-                        client.sendall(message)
-                    except Exception:
-                        disconnected_clients.append(client)
-                
-                for client in disconnected_clients:
-                    Log.info("LEDRenderer", f"Client {client.getpeername()} disconnected.")
-                    self._clients.remove(client)
-        else:
-        # Update the hardware display
-            for i in range(self.led_count):
-                self._pixels[i] = absolute_leds[i]
-            self._pixels.show()
+        """
+        Hand the current frame to the output thread and return immediately.
+        If the output thread is still busy with the previous frame, the previous one is dropped.
+        """
+        show_start = time.perf_counter()
+        debug_elements = self.debug_draw._get_elements()
+        with self._frame_condition:
+            np.copyto(self._buffers[self._back_buffer], self.leds)
+            if self._frame_pending:
+                self.frames_dropped += 1
+                self._dropped_counter.inc()
+                # keep the debug elements of the dropped frame, they would never be shown otherwise
+                self._pending_debug_elements += debug_elements
+            else:
+                self._pending_debug_elements = debug_elements
+            self._frame_pending = True
+            self._frame_condition.notify()
+        self._show_time.observe(time.perf_counter() - show_start)
+
+    def get_stats(self) -> dict:
+        """
+        Return the output counters: frames written, skipped as unchanged and dropped as outdated, also per sink.
+        """
+        return {
+            "frames_written": self.frames_written,
+            "frames_skipped": self.frames_skipped,
+            "frames_dropped": self.frames_dropped,
+            "sinks": {
+                worker.sink.name: {"frames_written": worker.frames_written, "frames_dropped": worker.frames_dropped}
+                for worker in self._sinks
+            }
+        }
+
+    def _output_loop(self):
+        """
+        Output thread, writes the newest shown frame to the outputs, paced to the refresh rate.
+        """
+        next_frame_time = time.monotonic()
+        while True:
+            with self._frame_condition:
+                while not self._frame_pending:
+                    self._frame_condition.wait()
+                # swap the buffers, show() continues writing into the other one
+                frame = self._buffers[self._back_buffer]
+                self._back_buffer = 1 - self._back_buffer
+                debug_elements = self._pending_debug_elements
+                self._pending_debug_elements = []
+                self._frame_pending = False
+            write_start = time.monotonic()
+            # static effects show the same frame over and over, there is no need to write it again
+            if not (self._output_dirty or debug_elements or self._debug_sent) \
+                    and write_start - self._last_write_time < self.idle_refresh_interval \
+                    and np.array_equal(frame, self._last_written):
+                self.frames_skipped += 1
+                self._skipped_counter.inc()
+                continue
+            self._output_dirty = False
+            np.copyto(self._last_written, frame)
+            self._last_write_time = write_start
+            try:
+                self._write_output(frame, debug_elements)
+                self.frames_written += 1
+                self._written_counter.inc()
+                self._output_time.observe(time.monotonic() - write_start)
+            except Exception as e:
+                Log.error_exc("LEDRenderer", e)
+            # wait for the next refresh slot, don't try to catch up on missed ones
+            next_frame_time = max(next_frame_time, write_start) + 1 / self.refresh_rate
+            time.sleep(max(0, next_frame_time - time.monotonic()))
+
+    def _write_output(self, frame: np.ndarray, debug_elements: list[dict]):
+        """
+        Apply the color correction to the frame and hand it to all output sinks.
+        """
+        # apply the color correction (brightness, gamma, white balance) to the output buffer in one lookup
+        correction_start = time.perf_counter()
+        absolute_leds = self._output
+        np.take(self._lut, frame + self._lut_offsets, out=absolute_leds)
+        self._correction_time.observe(time.perf_counter() - correction_start)
+        for worker in list(self._sinks):
+            worker.submit(frame if worker.sink.raw_frames else absolute_leds, debug_elements)
+        self._debug_sent = bool(debug_elements)
 
     class DebugDraw():
         def __init__(self):
@@ -176,39 +328,15 @@ class LEDRenderer:
             return element_list
 
 
-class DummyRenderer:
+class DummyRenderer(FrameBuffer):
     """
     Renderer without any hardware capabilities, used for testing.
     """
     def __init__(self, setup: Setup):
-        led_count = len(setup.coords)
-        self.led_count = led_count
-        self.leds = [(0, 0, 0)] * led_count
+        super().__init__(len(setup.coords))
         self.debug_draw = self.DebugDraw()
         #Log.debug("DummyRenderer", f"Initializing DummyRenderer with {led_count} LEDs.")
 
-    # add dictionary-like access to the self.leds for the code i already wrote with pixels in mind
-    def __getitem__(self, index):
-        return self.leds[index]
-    
-    def __setitem__(self, index, value):
-        if isinstance(value, tuple) and len(value) == 3:
-            self.leds[index] = value
-        elif isinstance(value, list) and len(value) == 3:
-            self.leds[index] = tuple(value)
-        else:
-            raise ValueError("Value must be a tuple of (R, G, B)")
-        
-    def __len__(self):
-        return self.led_count
-
-    def fill(self, color: tuple[int, int, int]):
-        for i in range(self.led_count):
-            self.leds[i] = color
-
-    def clear(self):
-        self.fill((0, 0, 0))
-
     def show(self):
         # DummyRenderer does not display anything
         pass
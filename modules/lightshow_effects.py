@@ -13,6 +13,7 @@ def l_effect(effect_type: EffectType):
     """
     This decorator is used to mark a function as a lightshow effect. It assigns an `EffectType` to the function, which can be used to categorize or identify the effect.
     Each lightshow effect must start its params with `steps`, followed by your required params and return a list of frames, where each frame is a list of colors in RGB format.
+    Faster effects can return a (steps, N, 3) numpy array instead, or a (colors, alpha) tuple of arrays where alpha is a (steps, N) bool mask of the drawn pixels.
 
     **Do not set unused pixels to black, but to None instead, representing transparency!**
     """
@@ -236,6 +236,46 @@ def point_in_poly(x, y, poly):
             inside = not inside
     return inside
 
+def hsv_to_rgb_array(h, s, v):
+    """
+    Vectorized colorsys.hsv_to_rgb, converts whole arrays of colors at once.
+    The hue wraps around, so values outside 0-1 are allowed.
+
+    h, s, v - arrays (or scalars) of the same shape with values 0-1
+    Returns an array of shape (..., 3) with RGB values 0-1.
+    """
+    h, s, v = np.broadcast_arrays(np.asarray(h, dtype=np.float64), np.asarray(s, dtype=np.float64), np.asarray(v, dtype=np.float64))
+    h6 = (h % 1.0) * 6.0
+    i = h6.astype(np.int64)
+    f = h6 - i
+    i %= 6
+    p = v * (1 - s)
+    q = v * (1 - s * f)
+    t = v * (1 - s * (1 - f))
+    r = np.choose(i, [v, q, p, p, t, v])
+    g = np.choose(i, [t, v, v, q, p, p])
+    b = np.choose(i, [p, p, t, v, v, q])
+    return np.stack((r, g, b), axis=-1)
+
+def distances_to_edges(points, edges):
+    """
+    Vectorized distance_to_closest_edge, calculates the distance of every point to the closest edge.
+
+    points - array of shape (N, 2) or (N, 3), only x and y are used
+    edges - list of polygon vertices, e.g. from convex_hull
+    Returns an array of N distances.
+    """
+    points = np.asarray(points, dtype=np.float64)[:, :2]
+    p1 = np.asarray([edge[:2] for edge in edges], dtype=np.float64)
+    p2 = np.roll(p1, -1, axis=0)
+    line_vec = p2 - p1
+    line_len_sq = np.einsum("ij,ij->i", line_vec, line_vec)
+    point_vec = points[:, None, :] - p1[None, :, :]
+    # position of the closest point on each edge, 0 - 1 from p1 to p2
+    t = np.clip(np.einsum("nej,ej->ne", point_vec, line_vec) / np.where(line_len_sq == 0, 1, line_len_sq), 0, 1)
+    closest = p1[None, :, :] + t[..., None] * line_vec[None, :, :]
+    return np.linalg.norm(points[:, None, :] - closest, axis=2).min(axis=1)
+
 class Bounds:
     def __init__(self, coords):
         """
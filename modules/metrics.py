@@ -0,0 +1,155 @@
+"""
+Lightweight performance metrics of the frame pipeline.
+
+Hot paths look up their histogram or counter once and then only call observe()/inc(), which is a couple
+of array writes. The statistics (percentiles, achieved rate) are only computed when the metrics are read.
+"""
+import threading
+import time
+import numpy as np
+
+PROMETHEUS_PREFIX = "spectraforge_"
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class RollingHistogram:
+    """
+    Keeps the last `window` observed values with their timestamps, plus the all-time count and sum.
+    """
+    WINDOW = 600 # 10 seconds of frames at 60 FPS
+
+    def __init__(self, window: int = WINDOW):
+        self._values = np.zeros(window, dtype=np.float64)
+        self._times = np.zeros(window, dtype=np.float64)
+        self._index = 0
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = self._index
+        self._values[index] = value
+        self._times[index] = time.monotonic()
+        self._index = (index + 1) % len(self._values)
+        self.count += 1
+        self.sum += value
+
+    def summary(self) -> dict:
+        """
+        Statistics of the rolling window. rate is the number of observations per second, so for
+        a per-frame histogram it's the achieved FPS.
+        """
+        size = min(self.count, len(self._values))
+        summary = {"count": self.count, "sum": self.sum}
+        if size == 0:
+            return summary
+        values = self._values[:size]
+        times = self._times[:size]
+        span = time.monotonic() - times.min()
+        summary.update({
+            "mean": float(values.mean()),
+            "max": float(values.max()),
+            "rate": size / span if span > 0 else 0.0,
+        })
+        for quantile, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+            summary[f"p{int(quantile * 100)}"] = float(value)
+        return summary
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class Metrics:
+    """
+    Registry of all the histograms and counters, identified by a name and labels, e.g.
+    Metrics().histogram("effect_update_seconds", effect="rainbow").
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(Metrics, cls).__new__(cls)
+            cls._instance._init_once()
+        return cls._instance
+
+    def _init_once(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _get(self, metrics: dict, factory, name: str, labels: dict):
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        metric = metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = metrics.setdefault(key, factory())
+        return metric
+
+    def histogram(self, name: str, **labels) -> RollingHistogram:
+        return self._get(self._histograms, RollingHistogram, name, labels)
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self._get(self._counters, Counter, name, labels)
+
+    def observe(self, name: str, value: float, **labels):
+        self.histogram(name, **labels).observe(value)
+
+    def inc(self, name: str, amount: int = 1, **labels):
+        self.counter(name, **labels).inc(amount)
+
+    def to_dict(self) -> dict:
+        """
+        All metrics as {"histograms": [...], "counters": [...]}, every entry has its name, labels and values.
+        """
+        with self._lock:
+            histograms = list(self._histograms.items())
+            counters = list(self._counters.items())
+        return {
+            "histograms": [{"name": name, "labels": dict(labels), **histogram.summary()} for (name, labels), histogram in histograms],
+            "counters": [{"name": name, "labels": dict(labels), "value": counter.value} for (name, labels), counter in counters],
+        }
+
+    def to_prometheus(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format. Histograms are exported as summaries of the
+        rolling window, with an extra <name>_rate gauge of the achieved rate.
+        """
+        data = self.to_dict()
+        lines = []
+        typed = set()
+
+        def add(name, metric_type, labels, value, sample_name=None):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"{sample_name or name}{_format_labels(labels)} {value}")
+
+        for histogram in sorted(data["histograms"], key=lambda h: h["name"]):
+            name = PROMETHEUS_PREFIX + histogram["name"]
+            labels = histogram["labels"]
+            for quantile in QUANTILES:
+                key = f"p{int(quantile * 100)}"
+                if key in histogram:
+                    add(name, "summary", {**labels, "quantile": str(quantile)}, histogram[key])
+            add(name, "summary", labels, histogram["sum"], f"{name}_sum")
+            add(name, "summary", labels, histogram["count"], f"{name}_count")
+        for histogram in sorted(data["histograms"], key=lambda h: h["name"]):
+            if "rate" in histogram:
+                add(PROMETHEUS_PREFIX + histogram["name"] + "_rate", "gauge", histogram["labels"], histogram["rate"])
+        for counter in sorted(data["counters"], key=lambda c: c["name"]):
+            add(PROMETHEUS_PREFIX + counter["name"], "counter", counter["labels"], counter["value"])
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = []
+    for label, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{label}="{value}"')
+    return "{" + ",".join(escaped) + "}"
@@ -0,0 +1,360 @@
+"""
+Outputs of the LEDRenderer. Every rendered frame fans out to all sinks, each running on its own thread,
+so a slow output (a simulator client, a recording, a network controller) never holds back the others.
+"""
+from abc import ABC, abstractmethod
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+import numpy as np
+from modules.log_manager import Log
+from modules.config_manager import Config
+from modules.metrics import Metrics
+import modules.frame_protocol as protocol
+import modules.frame_recording as recording
+
+
+class OutputSink(ABC):
+    """
+    Base class for all renderer outputs.
+
+    Description:
+        A sink receives finished frames (color correction already applied, unless raw_frames is set) and
+        writes them somewhere, like the LED hardware or the simulator. write() is always called from the
+        sink's own thread.
+
+    Methods:
+        write(frame, debug_elements): Write a (N, 3) uint8 frame to the output.
+        close(): Release the resources of the output.
+    """
+    name = "sink"
+    raw_frames = False # receive the frames before the color correction is applied
+
+    def __init__(self, led_count: int):
+        self.led_count = led_count
+
+    @abstractmethod
+    def write(self, frame: np.ndarray, debug_elements: list[dict]):
+        """
+        Write a frame to the output.
+
+        Args:
+            frame (np.ndarray): (N, 3) uint8 array of the LED colors. The sink owns this array.
+            debug_elements (list[dict]): Debug elements drawn since the last frame, only used by previews.
+
+        Returns:
+            None
+        """
+        pass
+
+    def close(self):
+        """
+        Release the resources of the output, called when the sink is removed from the renderer.
+        """
+        pass
+
+
+class SinkWorker:
+    """
+    Runs a sink on its own thread. The queue holds a single frame, a newer frame replaces the waiting one.
+    """
+    def __init__(self, sink: OutputSink):
+        self.sink = sink
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self._write_time = Metrics().histogram("sink_write_seconds", sink=sink.name)
+        self._dropped_counter = Metrics().counter("sink_frames_dropped_total", sink=sink.name)
+        self._queue = queue.Queue(maxsize=1)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"sink-{sink.name}")
+        self._thread.start()
+
+    def submit(self, frame: np.ndarray, debug_elements: list[dict]):
+        """
+        Queue a copy of the frame for the sink, replacing a frame the sink didn't get to yet.
+        """
+        item = (frame.copy(), debug_elements)
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.frames_dropped += 1
+                    self._dropped_counter.inc()
+                except queue.Empty:
+                    pass
+
+    def stop(self):
+        """
+        Stop the sink thread and close the sink.
+        """
+        self._running = False
+        self._thread.join()
+        self.sink.close()
+
+    def _run(self):
+        while self._running:
+            try:
+                frame, debug_elements = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                write_start = time.perf_counter()
+                self.sink.write(frame, debug_elements)
+                self._write_time.observe(time.perf_counter() - write_start)
+                self.frames_written += 1
+            except Exception as e:
+                Log.error_exc("OutputSink", e)
+
+
+class NeoPixelSink(OutputSink):
+    """
+    WS281x LEDs connected to a Raspberry Pi GPIO pin.
+    """
+    name = "neopixel"
+
+    def __init__(self, led_count: int, pin: str = "D18"):
+        super().__init__(led_count)
+        from neopixel import NeoPixel
+        import board
+        self._pixels = NeoPixel(getattr(board, pin), led_count, auto_write=False)
+
+    def write(self, frame, debug_elements):
+        self._pixels[:] = frame.tolist()
+        self._pixels.show()
+
+
+class FakeHardwareSink(OutputSink):
+    """
+    Stand-in for the LED hardware, so the whole pipeline runs on machines without any LEDs connected.
+    Keeps the last frame and takes as long to write as a WS281x strip would (30 us per LED).
+    """
+    name = "fake"
+
+    def __init__(self, led_count: int, led_write_time: float = 30e-6):
+        super().__init__(led_count)
+        self.write_time = led_count * led_write_time
+        self.last_frame = np.zeros((led_count, 3), dtype=np.uint8)
+
+    def write(self, frame, debug_elements):
+        self.last_frame = frame
+        time.sleep(self.write_time)
+
+
+class SimulatorSink(OutputSink):
+    """
+    TCP server streaming the frames to led_simulator.py clients using the binary frame protocol.
+    In delta mode only the changed LED ranges are sent, with a full keyframe every keyframe_interval frames.
+    """
+    name = "simulator"
+
+    def __init__(self, led_count: int, host: str = "127.0.0.1", port: int = 4897, delta: bool = False, keyframe_interval: int = 60):
+        super().__init__(led_count)
+        self._clients = []
+        self._debug_sent = False # whether the clients are currently showing debug elements
+        self.delta_mode = delta
+        self.keyframe_interval = keyframe_interval
+        self._last_sent = np.zeros((led_count, 3), dtype=np.uint8) # frame the synced clients are showing
+        self._frames_since_keyframe = 0
+        self._new_clients = [] # clients waiting for their first keyframe
+        self._clients_lock = threading.Lock() # a client is added to both lists at once
+        self._server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            self._server_socket.bind((host, port))
+            self._server_socket.listen()
+            Log.info("SimulatorSink", f"Server listening on {host}:{port}")
+
+            accept_thread = threading.Thread(target=self._accept_connections)
+            accept_thread.daemon = True
+            accept_thread.start()
+        except Exception as e:
+            Log.error("SimulatorSink", f"Failed to start server on {host}:{port}. {e}")
+            self._server_socket = None
+
+    def _accept_connections(self):
+        while True:
+            try:
+                client_socket, addr = self._server_socket.accept()
+                Log.info("SimulatorSink", f"New connection from {addr}")
+                with self._clients_lock:
+                    self._new_clients.append(client_socket)
+                    self._clients.append(client_socket)
+            except Exception as e:
+                Log.error("SimulatorSink", f"Error accepting connections: {e}")
+                break
+
+    def write(self, frame, debug_elements):
+        if not self._clients:
+            return
+        # Send the current LED colors to all connected clients
+        keyframe = protocol.pack_frame(frame)
+        message = keyframe
+        # new clients don't have any previous frame to apply the delta to, they get the keyframe,
+        # taken together so a client connecting meanwhile can't get a delta before its keyframe
+        with self._clients_lock:
+            clients = list(self._clients)
+            new_clients, self._new_clients = self._new_clients, []
+        if self.delta_mode:
+            self._frames_since_keyframe += 1
+            if self._frames_since_keyframe >= self.keyframe_interval:
+                self._frames_since_keyframe = 0
+            else:
+                delta = protocol.pack_delta(frame, protocol.changed_ranges(self._last_sent, frame))
+                # when most of the frame changed, the keyframe is smaller
+                if len(delta) < len(keyframe):
+                    message = delta
+            np.copyto(self._last_sent, frame)
+        # debug elements are rare, only send them when there are some, or once more to clear them
+        debug_message = b""
+        if debug_elements or self._debug_sent:
+            debug_message = protocol.pack_debug(debug_elements)
+            self._debug_sent = bool(debug_elements)
+        disconnected_clients = []
+        for client in clients:
+            try:
+                client.sendall((keyframe if client in new_clients else message) + debug_message)
+            except Exception:
+                disconnected_clients.append(client)
+
+        with self._clients_lock:
+            for client in disconnected_clients:
+                Log.info("SimulatorSink", "Client disconnected.")
+                self._clients.remove(client)
+
+    def close(self):
+        if self._server_socket:
+            self._server_socket.close()
+        for client in self._clients:
+            client.close()
+        self._clients = []
+
+
+class RecorderSink(OutputSink):
+    """
+    Records every written frame with its timestamp into a memory-mappable file (see modules.frame_recording).
+    Frames are recorded before the color correction, so replaying them through the renderer looks the same.
+    """
+    name = "recorder"
+    raw_frames = True
+
+    def __init__(self, led_count: int, path: str):
+        super().__init__(led_count)
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "wb")
+        self._file.write(recording.pack_header(led_count))
+        self._record = np.zeros(1, dtype=recording.record_dtype(led_count))
+        self._start_time = None
+        self.frames_recorded = 0
+
+    def write(self, frame, debug_elements):
+        now = time.monotonic()
+        if self._start_time is None:
+            self._start_time = now
+        self._record["time"] = now - self._start_time
+        self._record["rgb"] = frame
+        self._file.write(self._record.tobytes())
+        self.frames_recorded += 1
+
+    def close(self):
+        self._file.close()
+        Log.info("RecorderSink", f"Recorded {self.frames_recorded} frames to {self.path}")
+
+
+class DDPSink(OutputSink):
+    """
+    Streams a range of the LEDs to a network pixel controller (WLED, ESPixelStick, FPP, ...) over UDP using
+    the Distributed Display Protocol. Add one sink per controller to drive several of them in parallel:
+    [{"type": "ddp", "host": "192.168.1.50", "start": 0, "count": 300}, {"type": "ddp", "host": "192.168.1.51", "start": 300}]
+    """
+    name = "ddp"
+    PORT = 4048
+    # flags (version 1, push on the last packet) | sequence | data type | destination | data offset | data length
+    HEADER = struct.Struct("!BBBBIH")
+    FLAGS_VERSION = 0x40
+    FLAG_PUSH = 0x01
+    DATA_TYPE_RGB8 = 0x0B
+    MAX_DATA_LENGTH = 1440 # 480 RGB pixels, keeps every packet within a standard 1500 byte MTU
+
+    def __init__(self, led_count: int, host: str, port: int = PORT, start: int = 0, count: int | None = None, destination: int = 1):
+        super().__init__(led_count)
+        if count is None:
+            count = led_count - start
+        if start < 0 or count <= 0 or start + count > led_count:
+            raise ValueError(f"LED range {start}-{start + count} is out of bounds for {led_count} LEDs.")
+        self.name = f"ddp:{host}"
+        self.address = (host, port)
+        self.start = start
+        self.end = start + count
+        self.destination = destination
+        self._sequence = 0
+        self._failed_frames = 0 # frames not sent since the last successful one, only the first failure is logged
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # the payload layout is fixed, only the sequence number changes, so the packet splits are computed once
+        data_length = count * 3
+        self._packets = [
+            (offset, min(self.MAX_DATA_LENGTH, data_length - offset))
+            for offset in range(0, data_length, self.MAX_DATA_LENGTH)
+        ]
+        Log.info("DDPSink", f"Streaming LEDs {start}-{self.end} to {host}:{port} in {len(self._packets)} packets per frame.")
+
+    def write(self, frame, debug_elements):
+        data = memoryview(frame[self.start:self.end].tobytes())
+        self._sequence = self._sequence % 15 + 1 # 1-15, 0 means the sequence isn't used
+        last = len(self._packets) - 1
+        for index, (offset, length) in enumerate(self._packets):
+            flags = self.FLAGS_VERSION | (self.FLAG_PUSH if index == last else 0)
+            header = self.HEADER.pack(flags, self._sequence, self.DATA_TYPE_RGB8, self.destination, offset, length)
+            try:
+                self._socket.sendto(header + data[offset:offset + length], self.address)
+            except OSError as e:
+                # an unreachable controller shouldn't stop the others, try again with the next frame
+                if self._failed_frames == 0:
+                    Log.warn("DDPSink", f"Failed to send to {self.address[0]}: {e}")
+                self._failed_frames += 1
+                return
+        if self._failed_frames:
+            Log.info("DDPSink", f"Sending to {self.address[0]} again, {self._failed_frames} frames were lost.")
+            self._failed_frames = 0
+
+    def close(self):
+        self._socket.close()
+
+
+# sink types usable in the "output_sinks" config, e.g. [{"type": "simulator", "delta": true}]
+SINK_TYPES = {
+    NeoPixelSink.name: NeoPixelSink,
+    FakeHardwareSink.name: FakeHardwareSink,
+    SimulatorSink.name: SimulatorSink,
+    RecorderSink.name: RecorderSink,
+    DDPSink.name: DDPSink,
+}
+
+def default_sink_configs() -> list[dict]:
+    """
+    Sinks used when the config doesn't list any: the simulator on Windows, the GPIO LEDs elsewhere.
+    The simulator keeps the "simulator_delta" and "keyframe_interval" settings of configs without output sinks.
+    """
+    if os.name == 'nt':
+        return [{
+            "type": SimulatorSink.name,
+            "delta": Config().config.get("simulator_delta", False),
+            "keyframe_interval": Config().config.get("keyframe_interval", 60),
+        }]
+    return [{"type": NeoPixelSink.name}]
+
+def create_sink(led_count: int, sink_config: dict) -> OutputSink:
+    """
+    Create a sink from its config entry, the "type" key selects the sink and the other keys are its options.
+    """
+    options = dict(sink_config)
+    sink_type = options.pop("type", None)
+    if sink_type not in SINK_TYPES:
+        raise ValueError(f"Unknown output sink type '{sink_type}'. Valid types are: {list(SINK_TYPES.keys())}")
+    return SINK_TYPES[sink_type](led_count, **options)
@@ -1,4 +1,6 @@
 from enum import Enum
+from modules.spatial_index import SpatialIndex
+from modules.geometry import SetupGeometry
 
 class SetupType(Enum):
     TWO_DIMENSIONAL = "2D"
@@ -32,6 +34,20 @@ class Setup:
                 coord[2] = 0
         return setup
     
+    @property
+    def spatial_index(self) -> SpatialIndex:
+        """
+        KD-tree of the coordinates for fast radius and nearest LED queries, built on first use.
+        """
+        return SpatialIndex.for_coords(self.coords)
+
+    @property
+    def geometry(self) -> SetupGeometry:
+        """
+        Precomputed per-LED geometry (normalized and polar coordinates, convex hull, ...), computed on first use.
+        """
+        return SetupGeometry.for_coords(self.coords)
+
     def get_formatted_name(self):
         """
         Get the name of the setup in a file-safe format.
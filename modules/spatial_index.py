@@ -0,0 +1,88 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+class SpatialIndex:
+    """
+    KD-tree over the LED coordinates for finding the LEDs near a point or a line without checking all of them.
+    Building the tree is O(N log N), so it's built once per coordinate list and shared, use SpatialIndex.for_coords().
+    """
+    _cache = {} # id(coords) -> SpatialIndex
+    MAX_CACHED = 8
+    # when a query covers a big part of the setup, checking all the LEDs with numpy is faster than the tree
+    DENSE_QUERY_FRACTION = 0.25
+
+    def __init__(self, coords: list[list[float]]):
+        self.coords = coords
+        self.positions = np.zeros((len(coords), 3), dtype=np.float64)
+        self.positions[:, :len(coords[0])] = coords
+        self._tree = cKDTree(self.positions)
+        extents = self.positions.max(axis=0) - self.positions.min(axis=0)
+        self._extents = extents[extents > 0] # flat setups have no depth
+
+    @classmethod
+    def for_coords(cls, coords: list[list[float]]) -> "SpatialIndex":
+        """
+        Return the index of the coordinate list, building it only the first time it's requested.
+        """
+        index = cls._cache.get(id(coords))
+        # the id can be reused by a new list once the old one is gone, check it's really the same list
+        if index is None or index.coords is not coords:
+            if len(cls._cache) >= cls.MAX_CACHED:
+                cls._cache.clear()
+            index = cls(coords)
+            cls._cache[id(coords)] = index
+        return index
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Drop all the built indexes, called when the setup changes.
+        """
+        cls._cache = {}
+
+    @staticmethod
+    def _point(point) -> np.ndarray:
+        # allow 2D points, the z of 2D setups is 0
+        padded = np.zeros(3)
+        padded[:len(point)] = point
+        return padded
+
+    def query_radius(self, point, radius: float) -> np.ndarray:
+        """
+        Return the indices of the LEDs at most radius away from the point.
+        """
+        point = self._point(point)
+        if self._covered_fraction(radius) > self.DENSE_QUERY_FRACTION:
+            offsets = self.positions - point
+            return np.flatnonzero(np.einsum("ij,ij->i", offsets, offsets) <= radius * radius)
+        return np.asarray(self._tree.query_ball_point(point, radius, return_sorted=False), dtype=np.intp)
+
+    def _covered_fraction(self, radius: float) -> float:
+        """
+        Rough estimate of the share of the LEDs within the radius, assuming they are spread evenly.
+        """
+        if len(self._extents) == 0:
+            return 1.0
+        return float(np.prod(np.minimum(2 * radius, self._extents) / self._extents))
+
+    def nearest(self, point, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the distances and indices of the k LEDs closest to the point (scalars for k=1).
+        """
+        return self._tree.query(self._point(point), k=k)
+
+    def query_segment(self, start, end, radius: float) -> np.ndarray:
+        """
+        Return the indices of the LEDs at most radius away from the line segment start-end.
+        """
+        start = self._point(start)
+        end = self._point(end)
+        # every LED near the segment is in the sphere around its center, only those are checked exactly
+        center = (start + end) / 2
+        candidates = self.query_radius(center, np.linalg.norm(end - start) / 2 + radius)
+        segment = end - start
+        length_sq = segment @ segment
+        offsets = self.positions[candidates] - start
+        t = np.clip(offsets @ segment / length_sq, 0, 1) if length_sq > 0 else np.zeros(len(candidates))
+        distances = np.linalg.norm(offsets - t[:, None] * segment, axis=1)
+        return candidates[distances <= radius]
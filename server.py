@@ -1,7 +1,8 @@
 import os
 import traceback
 import json
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, render_template, request, jsonify, send_from_directory, Response
+from werkzeug.utils import secure_filename
 from modules.engine_manager import EngineManager
 from modules.engine_effects import EffectsEngine
 from modules.engine_calibration import CalibrationEngine
@@ -10,10 +11,15 @@ from modules.engine_sandbox import SandboxEngine
 from modules.engine_visualiser import VisualiserEngine
 from modules.engine_lightshow import LightshowEngine
 from modules.engine_video import VideoEngine
+from modules.engine_replay import ReplayEngine
+from modules.output_sinks import RecorderSink
+from modules.frame_recording import FILE_EXTENSION as RECORDING_EXTENSION
+import datetime
 from modules.setup import SetupType
 from flask_socketio import SocketIO, emit
 from modules.config_manager import Config
 from modules.log_manager import Log
+from modules.metrics import Metrics
 from modules.led_renderer import LEDRenderer
 import modules.upload_files as upload
 from modules.placeholder_manager import check as placeholder_check
@@ -55,7 +61,7 @@ def set_effect():
     result = effects_engine.set_effect(effect_name)
     if result["status"] == "success":
         return jsonify(result)
-    return jsonify(result), 404
+    return jsonify(result), 404 if result["message"] == "Effect not found" else 500
 
 
 @app.route("/api/get_parameters/<effect_name>", methods=["GET"])
@@ -79,6 +85,60 @@ def set_parameter():
         return jsonify(result)
     return jsonify(result), 400
 
+# Layer API endpoints
+
+@app.route("/api/layers", methods=["GET"])
+def get_layers():
+    """Get the effect layers drawn over the current effect."""
+    return jsonify(effects_engine.get_layers())
+
+@app.route("/api/layers/add", methods=["POST"])
+def add_layer():
+    """Add an effect layer, JSON: effect, blend_mode (normal/add/screen/multiply), opacity (0-1), mask (list of LED indices)."""
+    request_data = request.json
+    try:
+        opacity = float(request_data.get("opacity", 1.0))
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "Opacity must be a number from 0 to 1."}), 400
+    result = effects_engine.add_layer(
+        request_data.get("effect"),
+        request_data.get("blend_mode", "normal"),
+        opacity,
+        request_data.get("mask"),
+    )
+    if result["status"] == "success":
+        return jsonify(result)
+    return jsonify(result), 400
+
+@app.route("/api/layers/set", methods=["POST"])
+def set_layer():
+    """Change the blend mode, opacity or mask of a layer, JSON: index and the values to change. "mask": null draws it on all LEDs."""
+    request_data = request.json
+    opacity = request_data.get("opacity")
+    if opacity is not None:
+        try:
+            opacity = float(opacity)
+        except (TypeError, ValueError):
+            return jsonify({"status": "error", "message": "Opacity must be a number from 0 to 1."}), 400
+    result = effects_engine.set_layer(
+        request_data.get("index", -1),
+        blend_mode=request_data.get("blend_mode"),
+        opacity=opacity,
+        mask=request_data.get("mask"),
+        clear_mask="mask" in request_data and request_data["mask"] is None,
+    )
+    if result["status"] == "success":
+        return jsonify(result)
+    return jsonify(result), 400
+
+@app.route("/api/layers/remove", methods=["POST"])
+def remove_layer():
+    """Remove an effect layer, JSON: index."""
+    result = effects_engine.remove_layer(request.json.get("index", -1))
+    if result["status"] == "success":
+        return jsonify(result)
+    return jsonify(result), 400
+
 # Setup API endpoints
 
 # setup and calibration pages
@@ -267,13 +327,13 @@ def set_sandbox_file():
 @app.route("/settings")
 def page_settings():
     """Render the settings page."""
-    return render_template("settings.html", brightness=Config().config.get("brightness", 1)*100, performance_mode=Config().config.get("performance_mode", "normal"))
+    return render_template("settings.html", brightness=Config().config.get("brightness", 1)*100, gamma=Config().config.get("gamma", 1.0), performance_mode=Config().config.get("performance_mode", "normal"))
 
 @app.route("/api/settings/set_setting", methods=["POST"])
 def set_setting():
     """Set a specific setting in the server."""
     request_data = request.json
-    valid_settings = ["brightness", "performance_mode"]
+    valid_settings = ["brightness", "performance_mode", "gamma", "white_balance", "transition_duration"]
     for setting_name, setting_value in request_data.items():
         Log.debug("Server", f"Setting {setting_name} to {setting_value}")
         if setting_name not in valid_settings:
@@ -287,14 +347,40 @@ def set_setting():
             except Exception as e:
                 Log.error_exc("CalibrationEngine", e)
                 return jsonify({"status": "error", "message": str(e)}), 500
+        elif setting_name in ("gamma", "white_balance"):
+            try:
+                if setting_name == "gamma":
+                    renderer.set_color_correction(gamma=float(setting_value))
+                else:
+                    renderer.set_color_correction(white_balance=setting_value)
+                return jsonify({"status": "success", "message": f"{setting_name} set to {setting_value}."})
+            except (TypeError, ValueError) as e:
+                # not a number, gamma not positive or not 3 white balance channels
+                return jsonify({"status": "error", "message": f"Invalid {setting_name}: {e}"}), 400
+            except Exception as e:
+                Log.error_exc("LEDRenderer", e)
+                return jsonify({"status": "error", "message": str(e)}), 500
         elif setting_name == "performance_mode":
+            if setting_value not in Config.PERFORMANCE_FPS:
+                return jsonify({"status": "error", "message": f"Invalid performance mode. List: {list(Config.PERFORMANCE_FPS)}"}), 400
             try:
                 Config().config["performance_mode"] = setting_value
                 Config().save()
+                effects_engine.set_fps(Config().target_fps())
                 return jsonify({"status": "success", "message": f"Performance mode set to {setting_value}."})
             except Exception as e:
                 Log.error_exc("CalibrationEngine", e)
                 return jsonify({"status": "error", "message": str(e)}), 500
+        elif setting_name == "transition_duration":
+            try:
+                duration = float(setting_value)
+            except (TypeError, ValueError):
+                return jsonify({"status": "error", "message": "Transition duration must be a number of seconds."}), 400
+            if duration < 0:
+                return jsonify({"status": "error", "message": "Transition duration can't be negative."}), 400
+            Config().config["transition_duration"] = duration
+            Config().save()
+            return jsonify({"status": "success", "message": f"Transition duration set to {duration}s."})
 
 
 # Log API endpoints
@@ -308,6 +394,17 @@ def get_logs():
     logs = Log.get_log_messages()
     return jsonify({"logs": logs})
 
+# Metrics API
+@app.route("/api/metrics", methods=["GET"])
+def get_metrics():
+    """
+    Frame timings, achieved frame rates and drop/overrun counters.
+    JSON by default, Prometheus text format with ?format=prometheus.
+    """
+    if request.args.get("format") == "prometheus":
+        return Response(Metrics().to_prometheus(), mimetype="text/plain; version=0.0.4")
+    return jsonify({**Metrics().to_dict(), "renderer": renderer.get_stats()})
+
 @app.errorhandler(Exception)
 def handle_exception(e):
     """Handle exceptions globally and log them."""
@@ -407,6 +504,63 @@ def on_audio_seek(data):
     time_pos = data.get("time")
     manager.active_engine.on_audio_seek(time_pos)
 
+# Recording & replay API
+recorder_sink = None
+
+@app.route("/api/recording/start", methods=["POST"])
+def start_recording():
+    """Start recording every frame sent to the lights."""
+    global recorder_sink
+    if recorder_sink:
+        return jsonify({"status": "error", "message": "Already recording."}), 400
+    name = secure_filename((request.json or {}).get("name") or datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S"))
+    if not name:
+        return jsonify({"status": "error", "message": "Invalid recording name."}), 400
+    path = os.path.join(ReplayEngine.RECORDINGS_PATH, f"{name}{RECORDING_EXTENSION}")
+    try:
+        recorder_sink = RecorderSink(len(renderer), path)
+        renderer.add_sink(recorder_sink)
+        return jsonify({"status": "success", "message": f"Recording to {path}."})
+    except Exception as e:
+        Log.error_exc("Server", e)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route("/api/recording/stop", methods=["POST"])
+def stop_recording():
+    """Stop the current recording."""
+    global recorder_sink
+    if not recorder_sink:
+        return jsonify({"status": "error", "message": "Not recording."}), 400
+    renderer.remove_sink(recorder_sink)
+    frames = recorder_sink.frames_recorded
+    recorder_sink = None
+    return jsonify({"status": "success", "message": f"Recorded {frames} frames."})
+
+@app.route("/api/replay/list", methods=["GET"])
+def list_recordings():
+    return jsonify({"status": "success", "files": replay_engine.list_recordings()})
+
+@app.route("/api/replay/play", methods=["POST"])
+def play_recording():
+    """Replay a recording from the recordings folder."""
+    request_data = request.json
+    file_name = request_data.get("file_name")
+    if not file_name:
+        return jsonify({"status": "error", "message": "File name is required."}), 400
+    if secure_filename(file_name) != file_name:
+        return jsonify({"status": "error", "message": "Invalid file name."}), 400
+    try:
+        replay_engine.play(file_name, request_data.get("loop", True))
+        return jsonify({"status": "success", "message": f"Replaying {file_name}."})
+    except Exception as e:
+        Log.error_exc("ReplayEngine", e)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route("/api/replay/stop", methods=["POST"])
+def stop_replay():
+    replay_engine.stop()
+    return jsonify({"status": "success", "message": "Replay stopped."})
+
 @app.route("/upload")
 def page_upload():
     """Render the upload page."""
@@ -432,6 +586,7 @@ if __name__ == "__main__":
     visualiser_engine = VisualiserEngine(renderer, manager.active_setup, audio_engine_ready)
     lightshow_engine = LightshowEngine(renderer, manager.active_setup, audio_engine_ready)
     video_engine = VideoEngine(renderer, manager.active_setup)
+    replay_engine = ReplayEngine(renderer, manager.active_setup)
 
 
     # IMPORTANT! Always register the effects engine first, as it is the main engine.
@@ -442,6 +597,7 @@ if __name__ == "__main__":
     manager.register_audio_engine(visualiser_engine)
     manager.register_audio_engine(lightshow_engine)
     manager.register_engine(video_engine)
+    manager.register_engine(replay_engine)
 
     #video_engine.display_img("test.jpeg")
     video_engine.display_img("rick.png")
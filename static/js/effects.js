@@ -7,6 +7,10 @@ function changeEffect(effectName) {
     })
         .then(response => response.json())
         .then(data => {
+            if (data.status !== "success") {
+                alert(data.message);
+                return;
+            }
             console.log(`Effect set to ${effectName}`);
             // prevent the audio/lightshow file from being played again
             sessionStorage.removeItem('audioFile');